@@ -1,6 +1,6 @@
 {
     'name': 'Distributor Purchase Order Milestone',
-    'version': '16.0.1.0.0',
+    'version': '16.0.1.1.0',
     'category': 'Inventory/Purchase',
     'summary': 'Track delivery milestones for distributor purchase orders',
     'description': """
@@ -16,7 +16,7 @@
     """,
     'author': 'Your Company',
     'website': 'https://www.yourcompany.com',
-    'depends': ['base'],  # Assumes distributor.purchase.order already exists
+    'depends': ['oceana_distribution'],
     'data': [
         'views/distributor_purchase_order_views.xml',
     ],
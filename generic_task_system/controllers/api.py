@@ -49,13 +49,14 @@ class GenericTaskAPI(http.Controller):
             }
     
     @http.route('/api/messages', type='json', auth='user', methods=['GET'], csrf=False)
-    def get_messages(self, *kwargs):
+    def get_messages(self, **kwargs):
         """Get messages for current user"""
         try:
             messages = request.env['generic.message'].get_messages_by_criteria(
                 user_id=request.env.user.id,
                 unread_only=kwargs.get('unread_only', False),
-                limit=kwargs.get('limit', 50)
+                limit=kwargs.get('limit', 50),
+                fields=kwargs.get('fields'),
             )
             
             return {
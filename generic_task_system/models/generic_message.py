@@ -1,4 +1,13 @@
 from odoo import models, fields, api
+from odoo.exceptions import AccessError
+
+# Default fields returned by get_messages_by_criteria
+MESSAGE_API_FIELDS = [
+    'id', 'title', 'content', 'use_case', 'tags', 'message_type',
+    'priority', 'sender_id', 'scheduled_date', 'expiry_date',
+    'related_model', 'related_record_id', 'related_record_name',
+    'task_id', 'partner_id', 'custom_data', 'create_date'
+]
 
 
 class GenericMessage(models.Model):
@@ -50,9 +59,9 @@ class GenericMessage(models.Model):
 
     custom_data = fields.Json(string='Custom Data')
 
-    total_recipients = fields.Integer(string='Total Recipients', compute='_compute_recipient_stats')
-    read_count = fields.Integer(string='Read Count', compute='_compute_recipient_stats')
-    unread_count = fields.Integer(string='Unread Count', compute='_compute_recipient_stats')
+    total_recipients = fields.Integer(string='Total Recipients', compute='_compute_recipient_stats', store=True)
+    read_count = fields.Integer(string='Read Count', compute='_compute_recipient_stats', store=True)
+    unread_count = fields.Integer(string='Unread Count', compute='_compute_recipient_stats', store=True)
 
     # --- Compute fields ---
     @api.depends('scheduled_date')
@@ -82,32 +91,85 @@ class GenericMessage(models.Model):
             else:
                 record.related_record_name = False
 
-    @api.depends('recipient_ids', 'read_status_ids')
+    @api.depends('recipient_ids', 'read_status_ids.is_read')
     def _compute_recipient_stats(self):
+        # read counts of all messages in one grouped query
+        groups = self.env['generic.message.read.status']._read_group(
+            [('message_id', 'in', self.ids), ('is_read', '=', True)],
+            ['message_id'], ['message_id'],
+        )
+        read_counts = {group['message_id'][0]: group['message_id_count'] for group in groups}
         for record in self:
             record.total_recipients = len(record.recipient_ids)
-            record.read_count = len(record.read_status_ids.filtered('is_read'))
+            record.read_count = read_counts.get(record._origin.id, 0)
             record.unread_count = record.total_recipients - record.read_count
 
     # --- Overrides ---
-    @api.model
-    def create(self, vals):
-        message = super().create(vals)
-        for recipient in message.recipient_ids:
-            self.env['generic.message.read.status'].create({
-                'message_id': message.id,
-                'user_id': recipient.id,
-                'is_read': False
-            })
-        return message
+    @api.model_create_multi
+    def create(self, vals_list):
+        messages = super().create(vals_list)
+        messages._create_read_statuses()
+        return messages
+
+    def _create_read_statuses(self):
+        """Fan out one unread status per message and recipient with a single INSERT"""
+        if not self:
+            return
+        self.flush_recordset(['recipient_ids'])
+        recipients = self._fields['recipient_ids']
+        self.env.cr.execute("""
+            INSERT INTO generic_message_read_status
+                   (message_id, user_id, is_read, create_uid, create_date, write_uid, write_date)
+            SELECT rel.{message_column}, rel.{user_column}, false,
+                   %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+              FROM {relation} rel
+             WHERE rel.{message_column} = ANY(%(ids)s)
+            ON CONFLICT (message_id, user_id) DO NOTHING
+        """.format(
+            relation=recipients.relation,
+            message_column=recipients.column1,
+            user_column=recipients.column2,
+        ), {'uid': self.env.uid, 'ids': self.ids})
+        self.invalidate_recordset(['read_status_ids'])
 
     # --- Button Actions ---
     def mark_as_read_for_user(self, user_id=None):
+        """Mark the messages as read for the user and shift their read/unread counters.
+
+        The unread status rows are flipped with one UPDATE on the
+        (user_id, is_read, message_id) index and the counters of the messages
+        that actually changed are adjusted with a second one.
+        """
         if not user_id:
             user_id = self.env.user.id
-        status = self.read_status_ids.filtered(lambda r: r.user_id.id == user_id)
-        if status:
-            status.write({'is_read': True, 'read_date': fields.Datetime.now()})
+        if not self:
+            return True
+        self.check_access_rule('read')
+        Status = self.env['generic.message.read.status']
+        Status.check_access_rights('write')
+        Status.flush_model(['message_id', 'user_id', 'is_read'])
+        self.flush_recordset(['read_count', 'unread_count'])
+        self.env.cr.execute("""
+            UPDATE generic_message_read_status
+               SET is_read = true,
+                   read_date = now() at time zone 'UTC',
+                   write_uid = %(uid)s,
+                   write_date = now() at time zone 'UTC'
+             WHERE user_id = %(user_id)s
+               AND is_read = false
+               AND message_id = ANY(%(ids)s)
+         RETURNING message_id
+        """, {'uid': self.env.uid, 'user_id': user_id, 'ids': self.ids})
+        read_ids = [row[0] for row in self.env.cr.fetchall()]
+        if read_ids:
+            self.env.cr.execute("""
+                UPDATE generic_message
+                   SET read_count = read_count + 1,
+                       unread_count = unread_count - 1
+                 WHERE id = ANY(%s)
+            """, [read_ids])
+            Status.invalidate_model(['is_read', 'read_date', 'write_uid', 'write_date'])
+            self.browse(read_ids).invalidate_recordset(['read_count', 'unread_count'])
         return True
 
     def action_view_recipients(self):
@@ -141,11 +203,12 @@ class GenericMessage(models.Model):
         if kwargs.get('user_id'):
             domain.append(('recipient_ids', 'in', [kwargs['user_id']]))
         if kwargs.get('user_id') and kwargs.get('unread_only'):
-            unread_message_ids = self.env['generic.message.read.status'].search([
-                ('user_id', '=', kwargs['user_id']),
-                ('is_read', '=', False)
-            ]).mapped('message_id').ids
-            domain.append(('id', 'in', unread_message_ids))
+            # subquery served by the (user_id, is_read, message_id) index
+            self.env['generic.message.read.status'].flush_model(['message_id', 'user_id', 'is_read'])
+            domain.append(('id', 'inselect', (
+                "SELECT message_id FROM generic_message_read_status WHERE user_id = %s AND is_read = false",
+                [kwargs['user_id']]
+            )))
         if kwargs.get('message_type'):
             domain.append(('message_type', '=', kwargs['message_type']))
         if kwargs.get('priority'):
@@ -157,27 +220,55 @@ class GenericMessage(models.Model):
             domain.append(('expiry_date', '>', now))
 
         messages = self.search(domain, limit=kwargs.get('limit', 100))
-        result = messages.read([
-            'id', 'title', 'content', 'use_case', 'tags', 'message_type',
-            'priority', 'sender_id', 'scheduled_date', 'expiry_date',
-            'related_model', 'related_record_id', 'related_record_name',
-            'task_id', 'partner_id', 'custom_data', 'create_date'
-        ])
+        # 'fields' lets callers skip heavy values such as the HTML content
+        result = messages.read(kwargs.get('fields') or MESSAGE_API_FIELDS)
         if kwargs.get('user_id'):
+            # read state of the user for all messages in one query on (message_id, user_id)
+            Status = self.env['generic.message.read.status']
+            Status.check_access_rights('read')
+            Status.flush_model(['message_id', 'user_id', 'is_read', 'read_date'])
+            self.env.cr.execute("""
+                SELECT message_id, is_read, read_date
+                  FROM generic_message_read_status
+                 WHERE user_id = %s
+                   AND message_id = ANY(%s)
+            """, [kwargs['user_id'], messages.ids])
+            statuses = {message_id: (is_read, read_date) for message_id, is_read, read_date in self.env.cr.fetchall()}
             for msg_data in result:
-                status = self.browse(msg_data['id']).read_status_ids.filtered(
-                    lambda r: r.user_id.id == kwargs['user_id']
-                )
-                msg_data['is_read'] = status.is_read if status else False
-                msg_data['read_date'] = status.read_date if status else False
+                is_read, read_date = statuses.get(msg_data['id'], (False, False))
+                msg_data['is_read'] = bool(is_read)
+                msg_data['read_date'] = read_date or False
         return result
 
     @api.model
-    def send_message(self, **kwargs):
-        if 'recipient_ids' in kwargs and isinstance(kwargs['recipient_ids'], list):
-            kwargs['recipient_ids'] = [(6, 0, kwargs['recipient_ids'])]
-        message = self.create(kwargs)
-        return message.id
+    def get_unread_count(self, user_id=None):
+        """Unread badge: number of unread messages of the user (current user by default).
+
+        Only system users may count the messages of another user.
+        """
+        if user_id and user_id != self.env.uid and not self.env.is_system():
+            raise AccessError("You can only count your own unread messages.")
+        Status = self.env['generic.message.read.status']
+        Status.check_access_rights('read')
+        Status.flush_model(['user_id', 'is_read'])
+        self.env.cr.execute("""
+            SELECT COUNT(*)
+              FROM generic_message_read_status
+             WHERE user_id = %s
+               AND is_read = false
+        """, [user_id or self.env.uid])
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def send_message(self, messages=None, **kwargs):
+        """Send one message from keyword values, or a list of message dicts
+        created in one batch (bulk broadcasts). Returns the id, or the list of ids."""
+        vals_list = [dict(vals) for vals in messages] if messages is not None else [kwargs]
+        for vals in vals_list:
+            if 'recipient_ids' in vals and isinstance(vals['recipient_ids'], list):
+                vals['recipient_ids'] = [(6, 0, vals['recipient_ids'])]
+        records = self.create(vals_list)
+        return records.ids if messages is not None else records.id
 
 
 class GenericMessageReadStatus(models.Model):
@@ -192,3 +283,10 @@ class GenericMessageReadStatus(models.Model):
     _sql_constraints = [
         ('unique_user_message', 'unique(message_id, user_id)', 'Read status must be unique per user per message!')
     ]
+
+    def init(self):
+        # inbox and unread badge lookups per user
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS generic_message_read_status_inbox_idx
+                ON generic_message_read_status (user_id, is_read, message_id)
+        """)
@@ -0,0 +1,9 @@
+from . import models
+from . import controllers
+
+
+def post_init_hook(cr, registry):
+    """Build the funnel from the existing orders"""
+    from odoo import api, SUPERUSER_ID
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['milestone.funnel.daily'].rebuild_funnel()
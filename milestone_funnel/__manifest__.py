@@ -0,0 +1,25 @@
+{
+    'name': 'Milestone Funnel Analytics',
+    'version': '16.0.1.0.0',
+    'category': 'Sales',
+    'summary': 'Daily pre-aggregated delivery milestone funnel for sale and distributor orders',
+    'description': """
+        Maintains a daily milestone funnel table for sale orders and distributor
+        purchase orders, updated incrementally whenever x_delivery_milestone changes.
+
+        Features:
+        - Entries, exits and dwell time per day and milestone
+        - JSON endpoint returning stage counts, throughput and average dwell time
+          per day, week or month
+    """,
+    'author': 'Your Company',
+    'website': 'https://www.yourcompany.com',
+    'depends': ['custom_sale_milestone', 'custom_purchase_milestone', 'oceana_distribution'],
+    'data': [
+        'security/ir.model.access.csv',
+    ],
+    'post_init_hook': 'post_init_hook',
+    'installable': True,
+    'application': False,
+    'license': 'LGPL-3',
+}
@@ -0,0 +1,24 @@
+from odoo import http
+from odoo.http import request
+
+
+class MilestoneFunnelAPI(http.Controller):
+
+    @http.route('/api/milestone_funnel', type='json', auth='user', methods=['POST'], csrf=False)
+    def get_funnel(self, order_model=None, date_from=None, date_to=None, period='day', **kwargs):
+        """Stage counts, throughput and average dwell time per period"""
+        try:
+            return {
+                'success': True,
+                'funnel': request.env['milestone.funnel.daily'].get_funnel(
+                    order_model=order_model,
+                    date_from=date_from,
+                    date_to=date_to,
+                    period=period,
+                ),
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
@@ -0,0 +1,4 @@
+from . import milestone_funnel_daily
+from . import milestone_funnel_mixin
+from . import sale_order
+from . import distributor_purchase_order
@@ -0,0 +1,8 @@
+from odoo import models
+
+
+class DistributorPurchaseOrder(models.Model):
+    _name = 'distributor.purchase.order'
+    _inherit = ['distributor.purchase.order', 'milestone.funnel.mixin']
+
+    _funnel_order_model = 'distributor'
@@ -0,0 +1,200 @@
+from collections import defaultdict
+
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+
+PERIODS = ('day', 'week', 'month')
+
+ORDER_MODELS = ('sale', 'distributor')
+
+
+class MilestoneFunnelDaily(models.Model):
+    _name = 'milestone.funnel.daily'
+    _description = 'Daily Delivery Milestone Funnel'
+    _order = 'day desc, order_model, milestone'
+    _log_access = False
+
+    day = fields.Date(string='Day', required=True, readonly=True)
+    order_model = fields.Selection([
+        ('sale', 'Sale Orders'),
+        ('distributor', 'Distributor Purchase Orders'),
+    ], string='Orders', required=True, readonly=True)
+    milestone = fields.Char(string='Milestone', required=True, readonly=True)
+    entered = fields.Integer(string='Entered', readonly=True, help='Orders that reached the milestone that day')
+    exited = fields.Integer(string='Exited', readonly=True, help='Orders that left the milestone that day')
+    dwell_seconds = fields.Float(string='Dwell (s)', readonly=True,
+                                 help='Total time spent in the milestone by the orders that left it that day')
+
+    _sql_constraints = [
+        ('day_model_milestone_uniq', 'unique(day, order_model, milestone)',
+         'Only one funnel row per day, order type and milestone!')
+    ]
+
+    @api.model
+    def _record_transitions(self, order_model, transitions, day=None):
+        """Add milestone transitions to the funnel of ``day`` (today by default).
+
+        transitions: list of (from_milestone, to_milestone, dwell_seconds) where
+        from_milestone is False for new orders.
+        """
+        counters = defaultdict(lambda: [0, 0, 0.0])
+        for from_milestone, to_milestone, dwell_seconds in transitions:
+            if from_milestone:
+                counters[from_milestone][1] += 1
+                counters[from_milestone][2] += dwell_seconds or 0.0
+            if to_milestone:
+                counters[to_milestone][0] += 1
+        if not counters:
+            return
+        milestones = list(counters)
+        self.env.cr.execute("""
+            INSERT INTO milestone_funnel_daily (day, order_model, milestone, entered, exited, dwell_seconds)
+            SELECT %(day)s, %(order_model)s, m, e, x, d
+              FROM unnest(%(milestones)s::varchar[], %(entered)s::int[], %(exited)s::int[], %(dwell)s::float8[])
+                   AS t(m, e, x, d)
+            ON CONFLICT (day, order_model, milestone) DO UPDATE
+               SET entered = milestone_funnel_daily.entered + EXCLUDED.entered,
+                   exited = milestone_funnel_daily.exited + EXCLUDED.exited,
+                   dwell_seconds = milestone_funnel_daily.dwell_seconds + EXCLUDED.dwell_seconds
+        """, {
+            'day': day or fields.Datetime.now().date(),
+            'order_model': order_model,
+            'milestones': milestones,
+            'entered': [counters[m][0] for m in milestones],
+            'exited': [counters[m][1] for m in milestones],
+            'dwell': [counters[m][2] for m in milestones],
+        })
+        self.invalidate_model()
+
+    @api.model
+    def rebuild_funnel(self):
+        """Rebuild the whole funnel table.
+
+        Distributor orders are replayed from their milestone transition
+        history. Sale orders have no history: each one is counted as having
+        entered its current milestone on ``x_milestone_date`` (or its creation date).
+        """
+        for model in ('sale.order', 'distributor.purchase.order', 'distributor.purchase.order.milestone.history'):
+            self.env[model].flush_model()
+        cr = self.env.cr
+        cr.execute("DELETE FROM milestone_funnel_daily")
+        cr.execute("""
+            INSERT INTO milestone_funnel_daily (day, order_model, milestone, entered, exited, dwell_seconds)
+            SELECT day, order_model, milestone, SUM(entered), SUM(exited), SUM(dwell_seconds)
+              FROM (
+                    -- entries
+                    SELECT h.date::date AS day, 'distributor' AS order_model, h.to_milestone AS milestone,
+                           1 AS entered, 0 AS exited, 0.0 AS dwell_seconds
+                      FROM distributor_purchase_order_milestone_history h
+                     UNION ALL
+                    -- exits, dated by the next transition
+                    SELECT h.date::date, 'distributor', h.from_milestone, 0, 1,
+                           EXTRACT(EPOCH FROM h.date - LAG(h.date) OVER (PARTITION BY h.order_id ORDER BY h.date, h.id))
+                      FROM distributor_purchase_order_milestone_history h
+                     UNION ALL
+                    SELECT COALESCE(so.x_milestone_date, so.create_date)::date, 'sale', so.x_delivery_milestone, 1, 0, 0.0
+                      FROM sale_order so
+                     WHERE so.x_delivery_milestone IS NOT NULL
+                   ) events
+             WHERE milestone IS NOT NULL
+          GROUP BY day, order_model, milestone
+        """)
+        cr.execute("""
+            UPDATE distributor_purchase_order o
+               SET x_milestone_date = last.date
+              FROM (SELECT order_id, MAX(date) AS date
+                      FROM distributor_purchase_order_milestone_history
+                  GROUP BY order_id) last
+             WHERE o.id = last.order_id
+               AND o.x_milestone_date IS NULL
+        """)
+        cr.execute("""
+            UPDATE sale_order
+               SET x_milestone_date = create_date
+             WHERE x_milestone_date IS NULL
+        """)
+        self.invalidate_model()
+        self.env['sale.order'].invalidate_model(['x_milestone_date'])
+        self.env['distributor.purchase.order'].invalidate_model(['x_milestone_date'])
+        return True
+
+    @api.model
+    def get_funnel(self, order_model=None, date_from=None, date_to=None, period='day'):
+        """
+        Milestone funnel per period, read from the pre-aggregated daily table.
+
+        order_model: 'sale' | 'distributor' | None (both)
+        period: 'day' | 'week' | 'month'
+        Returns: list of dicts {period, order_model, milestone, entered (throughput),
+                 exited, avg_dwell_hours, stage_count} where stage_count is the
+                 number of orders in the milestone at the end of the period.
+                 Periods without transitions are included with their carried
+                 over stage_count.
+        """
+        if period not in PERIODS:
+            raise UserError("Invalid period '%s', expected one of: %s" % (period, ', '.join(PERIODS)))
+        if order_model and order_model not in ORDER_MODELS:
+            raise UserError("Invalid order type '%s'" % order_model)
+
+        self.check_access_rights('read')
+        self.flush_model()
+        conditions, params = ['TRUE'], {'period': period}
+        if order_model:
+            conditions.append('order_model = %(order_model)s')
+            params['order_model'] = order_model
+        last_period = '(SELECT MAX(period) FROM buckets)'
+        if date_to:
+            conditions.append('day <= %(date_to)s')
+            params['date_to'] = fields.Date.to_date(date_to)
+            last_period = 'date_trunc(%(period)s, %(date_to)s::date)::date'
+        period_filter = ''
+        if date_from:
+            # earlier days still feed the running stage counts
+            period_filter = "WHERE period >= date_trunc(%(period)s, %(date_from)s::date)::date"
+            params['date_from'] = fields.Date.to_date(date_from)
+
+        self.env.cr.execute("""
+            WITH buckets AS (
+                SELECT date_trunc(%(period)s, day)::date AS period, order_model, milestone,
+                       SUM(entered) AS entered, SUM(exited) AS exited, SUM(dwell_seconds) AS dwell_seconds
+                  FROM milestone_funnel_daily
+                 WHERE {conditions}
+              GROUP BY 1, 2, 3
+            ), series AS (
+                -- every period from the first bucket of a stage on, so quiet periods keep their stage count
+                SELECT gs.period::date AS period, keys.order_model, keys.milestone
+                  FROM (SELECT order_model, milestone, MIN(period) AS first_period
+                          FROM buckets
+                      GROUP BY 1, 2) keys
+                 CROSS JOIN LATERAL generate_series(
+                           keys.first_period,
+                           {last_period},
+                           ('1 ' || %(period)s)::interval
+                       ) AS gs(period)
+            ), running AS (
+                SELECT s.period, s.order_model, s.milestone,
+                       COALESCE(b.entered, 0) AS entered, COALESCE(b.exited, 0) AS exited,
+                       CASE WHEN b.exited > 0 THEN b.dwell_seconds / b.exited / 3600.0 END AS avg_dwell_hours,
+                       SUM(COALESCE(b.entered, 0) - COALESCE(b.exited, 0)) OVER (
+                           PARTITION BY s.order_model, s.milestone ORDER BY s.period
+                       ) AS stage_count
+                  FROM series s
+             LEFT JOIN buckets b
+                    ON b.period = s.period
+                   AND b.order_model = s.order_model
+                   AND b.milestone = s.milestone
+            )
+            SELECT period, order_model, milestone, entered::int, exited::int,
+                   avg_dwell_hours::float8, stage_count::int
+              FROM running
+              {period_filter}
+          ORDER BY period, order_model, milestone
+        """.format(
+            conditions=' AND '.join(conditions),
+            last_period=last_period,
+            period_filter=period_filter,
+        ), params)
+        result = self.env.cr.dictfetchall()
+        for row in result:
+            row['period'] = fields.Date.to_string(row['period'])
+        return result
@@ -0,0 +1,45 @@
+from odoo import models, fields, api
+
+
+class MilestoneFunnelMixin(models.AbstractModel):
+    _name = 'milestone.funnel.mixin'
+    _description = 'Milestone Funnel Tracking Mixin'
+
+    # Key of the inheriting model in milestone.funnel.daily.order_model
+    _funnel_order_model = None
+
+    x_milestone_date = fields.Datetime(
+        string='Milestone Since',
+        copy=False,
+        readonly=True,
+        help='When the order entered its current delivery milestone'
+    )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        now = fields.Datetime.now()
+        for vals in vals_list:
+            vals.setdefault('x_milestone_date', now)
+        records = super(MilestoneFunnelMixin, self).create(vals_list)
+        self.env['milestone.funnel.daily'].sudo()._record_transitions(self._funnel_order_model, [
+            (False, record.x_delivery_milestone, None) for record in records if record.x_delivery_milestone
+        ])
+        return records
+
+    def write(self, vals):
+        """Count milestone entries, exits and dwell time in the daily funnel"""
+        if 'x_delivery_milestone' not in vals:
+            return super(MilestoneFunnelMixin, self).write(vals)
+        milestone = vals['x_delivery_milestone']
+        now = fields.Datetime.now()
+        changed = self.filtered(lambda r: r.x_delivery_milestone != milestone)
+        transitions = [
+            (record.x_delivery_milestone, milestone,
+             (now - (record.x_milestone_date or record.create_date or now)).total_seconds())
+            for record in changed
+        ]
+        result = super(MilestoneFunnelMixin, self).write(vals)
+        if changed:
+            super(MilestoneFunnelMixin, changed).write({'x_milestone_date': now})
+            self.env['milestone.funnel.daily'].sudo()._record_transitions(self._funnel_order_model, transitions)
+        return result
@@ -0,0 +1,8 @@
+from odoo import models
+
+
+class SaleOrder(models.Model):
+    _name = 'sale.order'
+    _inherit = ['sale.order', 'milestone.funnel.mixin']
+
+    _funnel_order_model = 'sale'
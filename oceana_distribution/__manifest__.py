@@ -1,6 +1,6 @@
 {
     'name': 'Oceana Distribution Management',
-    'version': '16.0.1.0.0',
+    'version': '16.0.1.3.0',
     'category': 'Sales/Sales',
     'summary': 'Distributor Purchase Orders and Stock Management',
     'description': """
@@ -16,13 +16,19 @@ Oceana Distribution Management System
     'website': 'https://yourcompany.com',
     'depends': [
         'base',
+        'mail',
         'sale',
         'stock',
+        'shipment_variance',
     ],
     'data': [
         'security/ir.model.access.csv',
         'data/sequences.xml',
+        'data/ir_cron.xml',
         'views/distributor_purchase_views.xml',
+        'views/distributor_purchase_order_job_views.xml',
+        'views/distributor_stock_level_views.xml',
+        'views/distributor_stock_threshold_views.xml',
         'views/res_partner_views.xml',
         'views/sale_order_views.xml',
     ],
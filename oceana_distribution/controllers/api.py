@@ -0,0 +1,40 @@
+from odoo import http
+from odoo.http import request
+
+
+class DistributorOrderAPI(http.Controller):
+
+    @http.route('/api/distributor_orders/import', type='json', auth='user', methods=['POST'], csrf=False)
+    def import_orders(self, orders=None, chunk_size=500, **kwargs):
+        """Bulk import distributor purchase orders from a JSON payload"""
+        try:
+            result = request.env['distributor.purchase.order'].import_orders(orders or [], chunk_size=chunk_size)
+            return {
+                'success': True,
+                'created': result['created'],
+                'errors': result['errors'],
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    @http.route('/api/distributor_orders/import/csv', type='http', auth='user', methods=['POST'], csrf=False)
+    def import_orders_csv(self, file=None, chunk_size=500, **kwargs):
+        """Bulk import distributor purchase orders from an uploaded CSV file (or the raw request body)"""
+        try:
+            content = file.read() if file else request.httprequest.get_data()
+            if isinstance(content, bytes):
+                content = content.decode('utf-8-sig')
+            result = request.env['distributor.purchase.order'].import_orders_csv(content, chunk_size=int(chunk_size))
+            return request.make_json_response({
+                'success': True,
+                'created': result['created'],
+                'errors': result['errors'],
+            })
+        except Exception as e:
+            return request.make_json_response({
+                'success': False,
+                'error': str(e)
+            }, status=400)
@@ -0,0 +1,24 @@
+def migrate(cr, version):
+    """Link existing '<distributor> Warehouse' locations to their distributor.
+
+    Locations used to be matched by name only; backfill the indexed
+    stock_location.distributor_id link, keeping the oldest location when a
+    distributor has several candidates.
+    """
+    if not version:
+        return
+    cr.execute("""
+        UPDATE stock_location sl
+           SET distributor_id = match.partner_id
+          FROM (
+                SELECT DISTINCT ON (rp.id) rp.id AS partner_id, loc.id AS location_id
+                  FROM res_partner rp
+                  JOIN stock_location loc
+                    ON loc.name = rp.name || ' Warehouse'
+                   AND loc.usage = 'internal'
+                 WHERE rp.id IN (SELECT distributor_id FROM distributor_purchase_order)
+              ORDER BY rp.id, loc.id
+               ) match
+         WHERE sl.id = match.location_id
+           AND sl.distributor_id IS NULL
+    """)
@@ -0,0 +1,9 @@
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """Build the distributor stock snapshot from the existing quants."""
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['distributor.stock.level'].rebuild_snapshot()
@@ -0,0 +1,16 @@
+def migrate(cr, version):
+    """Seed the milestone history with the current milestone of existing orders."""
+    if not version:
+        return
+    cr.execute("""
+        INSERT INTO distributor_purchase_order_milestone_history
+               (order_id, from_milestone, to_milestone, user_id, date)
+        SELECT o.id, NULL, COALESCE(o.x_delivery_milestone, 'draft'), o.create_uid,
+               COALESCE(o.create_date, now() at time zone 'UTC')
+          FROM distributor_purchase_order o
+         WHERE NOT EXISTS (
+                SELECT 1
+                  FROM distributor_purchase_order_milestone_history h
+                 WHERE h.order_id = o.id
+         )
+    """)
@@ -1,3 +1,10 @@
 from . import distributor_purchase_order
 from . import res_partner
 from . import sale_order
+from . import stock_location
+from . import distributor_purchase_order_job
+from . import distributor_stock_level
+from . import stock_move
+from . import distributor_stock_threshold
+from . import distributor_purchase_order_import
+from . import distributor_purchase_order_milestone
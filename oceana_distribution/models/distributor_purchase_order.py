@@ -1,5 +1,13 @@
+import logging
+from collections import defaultdict
+
 from odoo import models, fields, api
 from odoo.exceptions import UserError, ValidationError
+from odoo.tools import float_round, split_every
+
+from odoo.addons.oceana_distribution.tools import PipelineProbe
+
+_logger = logging.getLogger(__name__)
 
 
 class DistributorPurchaseOrder(models.Model):
@@ -20,6 +28,7 @@ class DistributorPurchaseOrder(models.Model):
         'res.partner', 
         string='Distributor', 
         required=True,
+        index=True,
         domain=[('is_distributor', '=', True)]
     )
     
@@ -47,7 +56,7 @@ class DistributorPurchaseOrder(models.Model):
         ('shipped', 'Shipped'),
         ('excess_shipped', 'Excess Shipped'),
         ('delivered', 'Delivered'),
-    ], string='Delivery Milestone', default='draft', tracking=True,
+    ], string='Delivery Milestone', default='draft', index=True,
        help='Track the delivery progress of this purchase order')
     
     order_line_ids = fields.One2many(
@@ -63,66 +72,85 @@ class DistributorPurchaseOrder(models.Model):
     )
     
     notes = fields.Text(string='Notes')
+
+    stock_processing_state = fields.Selection([
+        ('queued', 'Queued'),
+        ('done', 'Done'),
+        ('failed', 'Failed')
+    ], string='Stock Processing', copy=False, readonly=True,
+       help='Status of the queued stock move generation (asynchronous confirmation only)')
+
+    stock_processing_error = fields.Text(string='Stock Processing Error', copy=False, readonly=True)
     
     @api.depends('order_line_ids.subtotal')
     def _compute_total_amount(self):
         for order in self:
             order.total_amount = sum(line.subtotal for line in order.order_line_ids)
 
-    @api.model
-    def create(self, vals):
+    @api.model_create_multi
+    def create(self, vals_list):
         """Ensure new orders start with draft milestone"""
-        if 'x_delivery_milestone' not in vals:
-            vals['x_delivery_milestone'] = 'draft'
-        return super(DistributorPurchaseOrder, self).create(vals)
+        for vals in vals_list:
+            if 'x_delivery_milestone' not in vals:
+                vals['x_delivery_milestone'] = 'draft'
+        return super(DistributorPurchaseOrder, self).create(vals_list)
 
     # =====================================================
     # MILESTONE ACTION METHODS
     # =====================================================
     def action_set_payment_pending(self):
         """Set milestone to payment pending"""
-        self.write({'x_delivery_milestone': 'payment_pending'})
+        return self._apply_milestone_transition('payment_pending')
 
     def action_confirm_payment(self):
         """Set milestone to confirmed (payment received)"""
-        self.write({'x_delivery_milestone': 'confirmed'})
+        return self._apply_milestone_transition('confirmed')
 
     def action_mark_partial_shipped(self):
         """Set milestone to partially shipped"""
-        self.write({'x_delivery_milestone': 'partial_shipped'})
+        return self._apply_milestone_transition('partial_shipped')
 
     def action_mark_shipped(self):
         """Set milestone to shipped"""
-        self.write({'x_delivery_milestone': 'shipped'})
+        return self._apply_milestone_transition('shipped')
 
     def action_mark_excess_shipped(self):
         """Set milestone to excess shipped"""
-        self.write({'x_delivery_milestone': 'excess_shipped'})
+        return self._apply_milestone_transition('excess_shipped')
 
     def action_mark_delivered(self):
         """Set milestone to delivered"""
-        self.write({'x_delivery_milestone': 'delivered'})
+        return self._apply_milestone_transition('delivered')
 
     # =====================================================
     # EXISTING METHODS
     # =====================================================
     def action_confirm(self):
-        import logging
-        _logger = logging.getLogger(__name__)
-    
-        _logger.info("========== CONFIRMING PURCHASE ORDER ==========")
-        for order in self:
-            _logger.info(f"Order: {order.name}, Distributor: {order.distributor_id.name}")
-            if not order.order_line_ids:
-                raise UserError("Cannot confirm order without order lines.")
-        
-            order.state = 'confirmed'
-            _logger.info("Creating stock moves...")
-            order._create_stock_moves()
-            _logger.info("Stock moves created successfully")
-    
+        """Confirm the purchase orders and create their stock moves in one batch.
+
+        When asynchronous confirmation is enabled the orders are only queued;
+        their stock moves are generated by the stock move job cron.
+        """
+        empty_orders = self.filtered(lambda o: not o.order_line_ids)
+        if empty_orders:
+            raise UserError("Cannot confirm order without order lines: %s" % ', '.join(empty_orders.mapped('name')))
+
+        self.write({'state': 'confirmed'})
+        if self._use_async_stock_moves():
+            self.env['distributor.purchase.order.job'].sudo()._enqueue(self)
+        else:
+            self._create_stock_moves()
+
         return True
 
+    def _use_async_stock_moves(self):
+        """Asynchronous mode: ``async_stock_moves`` context key, else the
+        ``oceana_distribution.async_stock_moves`` system parameter"""
+        if 'async_stock_moves' in self.env.context:
+            return bool(self.env.context['async_stock_moves'])
+        param = self.env['ir.config_parameter'].sudo().get_param('oceana_distribution.async_stock_moves')
+        return param not in (False, '', '0', 'False', 'false')
+
 
     def _delete_action_confirm(self):
         """Confirm the purchase order and create stock moves"""
@@ -145,113 +173,171 @@ class DistributorPurchaseOrder(models.Model):
         return True
     
     def _create_stock_moves(self):
-        """Create stock moves to distributor location"""
-        import logging
-        _logger = logging.getLogger(__name__)
-        
-        for order in self:
-            _logger.info(f"Getting/creating location for distributor: {order.distributor_id.name}")
-            
-            # Find or create distributor location
-            distributor_location = order._get_or_create_distributor_location()
-            _logger.info(f"Location found/created: ID={distributor_location.id}, Name={distributor_location.name}")
-            
-            # Create a picking for this order
-            picking_type = self.env['stock.picking.type'].search([
-                ('code', '=', 'internal'),
-                ('warehouse_id.company_id', '=', self.env.company.id)
-            ], limit=1)
-            
-            if not picking_type:
-                picking_type = self.env['stock.picking.type'].search([
-                    ('code', '=', 'internal')
-                ], limit=1)
-            
-            picking_vals = {
+        """Create stock moves to distributor locations for the whole recordset.
+
+        All pickings are created with a single multi-record ``create``, all moves
+        with another one, and the pickings are then confirmed, assigned and
+        validated together so the ORM flushes once per step instead of once per order.
+
+        Per-phase timings and query counts are collected when the
+        ``stock_move_instrumentation`` context key is set or the module logger
+        is at DEBUG level; see :class:`PipelineProbe`.
+
+        :return: the instrumentation records (empty when instrumentation is off)
+        """
+        probe = PipelineProbe(self.env, 'stock_move', context_key='stock_move_instrumentation', logger=_logger)
+        if not self:
+            return probe.records
+
+        with probe.phase('reference_resolution'):
+            references = self._resolve_stock_move_references()
+        picking_type = references['picking_type']
+        stock_location = references['stock_location']
+        carton_uom = references['carton_uom']
+
+        # Find or create distributor locations
+        with probe.phase('location_resolution') as data:
+            locations_by_distributor = self._get_distributor_locations(
+                parent_location=references['locations_root'],
+            )
+            locations = {order.id: locations_by_distributor[order.distributor_id.id] for order in self}
+            data['locations'] = len(locations_by_distributor)
+
+        # Create one picking per order in a single batch
+        with probe.phase('picking_creation') as data:
+            pickings = self.env['stock.picking'].create([{
                 'picking_type_id': picking_type.id,
-                'location_id': self.env.ref('stock.stock_location_stock').id,
-                'location_dest_id': distributor_location.id,
+                'location_id': stock_location.id,
+                'location_dest_id': locations[order.id].id,
                 'origin': order.name,
                 'move_type': 'direct',
-            }
-            
-            picking = self.env['stock.picking'].create(picking_vals)
-            _logger.info(f"Created picking: {picking.name}")
-            
-            for line in order.order_line_ids:
-                if line.quantity > 0:
-                    _logger.info(f"Creating move for product {line.product_id.name}, qty: {line.quantity}")
-                    
-                    # Get the carton UoM (assuming it's stored on the line or use a fixed one)
-                    carton_uom = self.env['uom.uom'].search([('name', '=', 'Carton'),('category_id.name', '=', 'Unit')], limit=1)
-                    product_base_uom = line.product_id.uom_id
-                    
-                    # Convert from cartons to product's base UoM
-                    quantity_in_base_uom = carton_uom._compute_quantity(
-                        line.quantity,  # 5 cartons
-                        product_base_uom,  # Convert to base UoM (units)
-                        rounding_method='HALF-UP'
-                    )
-                    
-                    _logger.info(f"UoM conversion: {line.quantity} {carton_uom.name} = {quantity_in_base_uom} {product_base_uom.name}")
-                    _logger.info(f"Carton UoM factor: {carton_uom.factor}, ratio: {carton_uom.factor_inv}")
-                    
-                    # Create stock move in base UoM
-                    move_vals = {
-                        'name': f'Distributor Purchase: {line.product_id.display_name}',
-                        'product_id': line.product_id.id,
-                        'product_uom_qty': quantity_in_base_uom,
-                        'product_uom': product_base_uom.id,
-                        'location_id': self.env.ref('stock.stock_location_stock').id,
-                        'location_dest_id': distributor_location.id,
-                        'picking_id': picking.id,
-                        'origin': order.name,
-                        'company_id': self.env.company.id,
-                    }
-                    
-                    _logger.info(f"Move values: From location {move_vals['location_id']} to {move_vals['location_dest_id']}")
-                    
-                    move = self.env['stock.move'].create(move_vals)
-                    _logger.info(f"Stock move {move.id} created with qty {quantity_in_base_uom}")
-            
-            # Confirm the picking
-            picking.action_confirm()
-            _logger.info(f"Picking confirmed: {picking.name}")
-            
-            # Check availability
-            picking.action_assign()
-            _logger.info(f"Picking assigned: {picking.name}, State: {picking.state}")
-            
-            # Set quantity_done for each move
-            for move in picking.move_ids:
-                if move.product_uom_qty > 0:
-                    move.quantity_done = move.product_uom_qty
-                    _logger.info(f"Set quantity_done for {move.product_id.name}: {move.quantity_done}")
-            
-            # Validate the picking
+            } for order in self])
+            data['pickings'] = len(pickings)
+
+        # Create the moves of every picking in a single batch
+        with probe.phase('move_creation') as data:
+            move_vals_list = []
+            for order, picking in zip(self, pickings):
+                for line in order.order_line_ids:
+                    if line.quantity > 0:
+                        product_base_uom = line.product_id.uom_id
+
+                        # Convert from cartons to product's base UoM
+                        quantity_in_base_uom = carton_uom._compute_quantity(
+                            line.quantity,  # 5 cartons
+                            product_base_uom,  # Convert to base UoM (units)
+                            rounding_method='HALF-UP'
+                        )
+
+                        # Create stock move in base UoM
+                        move_vals_list.append({
+                            'name': f'Distributor Purchase: {line.product_id.display_name}',
+                            'product_id': line.product_id.id,
+                            'product_uom_qty': quantity_in_base_uom,
+                            'product_uom': product_base_uom.id,
+                            'location_id': stock_location.id,
+                            'location_dest_id': locations[order.id].id,
+                            'picking_id': picking.id,
+                            'origin': order.name,
+                            'company_id': self.env.company.id,
+                        })
+
+            self.env['stock.move'].create(move_vals_list)
+            data['moves'] = len(move_vals_list)
+
+        # Confirm the pickings
+        with probe.phase('confirm'):
+            pickings.action_confirm()
+
+        # Check availability
+        with probe.phase('assign'):
+            pickings.action_assign()
+
+        # Validate the pickings
+        with probe.phase('validate') as data:
+            data['move_lines'] = self._set_moves_quantity_done(pickings.move_ids)
+
             try:
-                result = picking.with_context(skip_backorder=True).button_validate()
-                _logger.info(f"Picking validated: {picking.name}, State: {picking.state}")
-                
+                result = pickings.with_context(skip_backorder=True).button_validate()
+
                 # Handle any wizard that appears
                 if isinstance(result, dict):
                     if result.get('res_model') == 'stock.backorder.confirmation':
                         backorder_wizard = self.env['stock.backorder.confirmation'].browse(result['res_id'])
                         backorder_wizard.process_cancel_backorder()
-                        _logger.info(f"Backorder wizard processed")
                     elif result.get('res_model') == 'stock.immediate.transfer':
                         immediate_transfer = self.env['stock.immediate.transfer'].browse(result['res_id'])
                         immediate_transfer.process()
-                        _logger.info(f"Immediate transfer processed")
-                    
-            except Exception as e:
-                _logger.error(f"Error validating picking: {str(e)}")
+
+            except Exception:
+                _logger.exception("Error validating pickings of distributor orders %s", self.ids)
                 raise
-            
-            # Log final quantities
-            for line in order.order_line_ids:
-                qty_available = line.product_id.with_context(location=distributor_location.id).qty_available
-                _logger.info(f"Available quantity for {line.product_id.name} at {distributor_location.name}: {qty_available}")
+
+        return probe.records
+
+    @api.model
+    def _set_moves_quantity_done(self, moves):
+        """Set the done quantity of ``moves`` to their demand in batches.
+
+        Same result as assigning ``quantity_done`` move by move: reserved move
+        lines are done for their reserved quantity, the rest of the demand goes
+        to the last line of the move, and moves without any line get one. The
+        existing lines are updated with one write per distinct quantity and the
+        missing ones are created with a single ``create``.
+
+        :return: number of updated or created move lines
+        """
+        qty_done_by_line = {}
+        new_line_vals = []
+        for move in moves:
+            if move.product_uom_qty <= 0:
+                continue
+            move_lines = move.move_line_ids
+            if not move_lines:
+                new_line_vals.append(dict(move._prepare_move_line_vals(), qty_done=move.product_uom_qty))
+                continue
+            remaining = move.product_uom_qty
+            for move_line in move_lines[:-1]:
+                qty_done_by_line[move_line.id] = move_line.reserved_uom_qty
+                remaining -= move_line.product_uom_id._compute_quantity(move_line.reserved_uom_qty, move.product_uom)
+            last_line = move_lines[-1]
+            qty_done_by_line[last_line.id] = move.product_uom._compute_quantity(remaining, last_line.product_uom_id)
+
+        lines_by_qty = defaultdict(list)
+        for line_id, qty_done in qty_done_by_line.items():
+            lines_by_qty[qty_done].append(line_id)
+        for qty_done, line_ids in lines_by_qty.items():
+            self.env['stock.move.line'].browse(line_ids).write({'qty_done': qty_done})
+        self.env['stock.move.line'].create(new_line_vals)
+        return len(qty_done_by_line) + len(new_line_vals)
+
+    def _resolve_stock_move_references(self):
+        """Resolve the records shared by every move of a stock move batch.
+
+        These lookups do not depend on the order or the line, so they are
+        resolved once per ``_create_stock_moves`` call instead of once per
+        order (picking type, locations) or once per line (carton UoM).
+        """
+        picking_type = self.env['stock.picking.type'].search([
+            ('code', '=', 'internal'),
+            ('warehouse_id.company_id', '=', self.env.company.id)
+        ], limit=1)
+
+        if not picking_type:
+            picking_type = self.env['stock.picking.type'].search([
+                ('code', '=', 'internal')
+            ], limit=1)
+
+        # Get the carton UoM (assuming it's stored on the line or use a fixed one).
+        # When it is missing, the empty recordset leaves quantities unconverted.
+        carton_uom = self.env['uom.uom'].search([('name', '=', 'Carton'), ('category_id.name', '=', 'Unit')], limit=1)
+
+        return {
+            'picking_type': picking_type,
+            'carton_uom': carton_uom,
+            'stock_location': self.env.ref('stock.stock_location_stock'),
+            'locations_root': self.env.ref('stock.stock_location_locations'),
+        }
 
     def _qqqcreate_stock_moves(self):
         """Create stock moves to distributor location"""
@@ -277,35 +363,49 @@ class DistributorPurchaseOrder(models.Model):
                     move._action_done()
     
             
-    def _get_or_create_distributor_location(self):
+    def _get_or_create_distributor_location(self, parent_location=None):
         """Get or create stock location for distributor"""
-        import logging
-        _logger = logging.getLogger(__name__)
-    
-        location_name = f'{self.distributor_id.name} Warehouse'
-        _logger.info(f"Searching for location with name: {location_name}")
-    
-        location = self.env['stock.location'].search([
-            ('name', '=', location_name),
+        self.ensure_one()
+        return self._get_distributor_locations(parent_location=parent_location)[self.distributor_id.id]
+
+    def _get_distributor_locations(self, parent_location=None):
+        """Get or create the stock locations of all distributors in ``self``.
+
+        Locations are matched through the indexed ``stock.location.distributor_id``
+        link, so resolution is a single ``IN`` query whatever the number of orders,
+        and renaming a partner no longer creates a duplicate location.
+
+        :return: dict mapping distributor (res.partner) id to its stock.location
+        """
+        distributors = self.distributor_id
+        if not distributors:
+            return {}
+
+        locations = self.env['stock.location'].search([
+            ('distributor_id', 'in', distributors.ids),
             ('usage', '=', 'internal')
-        ], limit=1)
-    
-        if not location:
-            _logger.info(f"Location not found, creating new one: {location_name}")
-        
-            # Create new location for distributor
-            location = self.env['stock.location'].create({
-                'name': location_name,
-                'location_id': self.env.ref('stock.stock_location_locations').id,
+        ], order='id')
+
+        result = {}
+        for location in locations:
+            result.setdefault(location.distributor_id.id, location)
+
+        missing = distributors.filtered(lambda d: d.id not in result)
+        if missing:
+            _logger.info("Creating %s distributor location(s)", len(missing))
+
+            # Create new locations for distributors
+            parent = parent_location or self.env.ref('stock.stock_location_locations')
+            new_locations = self.env['stock.location'].create([{
+                'name': f'{distributor.name} Warehouse',
+                'location_id': parent.id,
                 'usage': 'internal',
-            })
-        
-            _logger.info(f"Location created: ID={location.id}, Name={location.name}")
-        else:
-            _logger.info(f"Location found: ID={location.id}, Name={location.name}")
-    
-        return location
-        
+                'distributor_id': distributor.id,
+            } for distributor in missing])
+            result.update(zip(missing.ids, new_locations))
+
+        return result
+
 
     def _qqqget_or_create_distributor_location(self):
         """Get or create stock location for distributor"""
@@ -331,7 +431,9 @@ class DistributorPurchaseOrder(models.Model):
 
 class DistributorPurchaseOrderLine(models.Model):
     _name = 'distributor.purchase.order.line'
+    _inherit = ['shipment.variance.mixin']
     _description = 'Distributor Purchase Order Line'
+    _shipment_ordered_qty_field = 'quantity'
 
     order_id = fields.Many2one(
         'distributor.purchase.order', 
@@ -365,106 +467,175 @@ class DistributorPurchaseOrderLine(models.Model):
     )
 
     # =====================================================
-    # MANUAL SHIPMENT TRACKING (from purchase_manual_shipment)
+    # MANUAL SHIPMENT TRACKING (fields from shipment.variance.mixin)
     # =====================================================
-    manual_shipped_qty = fields.Float(
-        string='Manual Shipped Qty',
-        digits='Product Unit of Measure',
-        help='Actual quantity shipped',
-        copy=False,
-    )
-
-    qty_diff_manual = fields.Float(
-        string='Shipment Variance',
-        compute='_compute_qty_diff_manual',
-        store=True,
-        digits='Product Unit of Measure',
-        help='Difference between ordered and manually shipped quantity',
-    )
-
-    adjustment_note = fields.Char(
-        string='Adjustment Reason',
-        help='Reason for shipment quantity difference',
-        copy=False,
-    )
-
-    manual_adjusted = fields.Boolean(
-        string='Manually Adjusted',
-        compute='_compute_manual_adjusted',
-        store=True,
-        help='Line has manual shipment adjustment',
-    )
-
-    adjustment_date = fields.Datetime(
-        string='Adjustment Date',
-        copy=False,
-        readonly=True,
-    )
-
-    adjustment_user_id = fields.Many2one(
-        'res.users',
-        string='Adjusted By',
-        copy=False,
-        readonly=True,
-    )
-
     line_shipment_status = fields.Selection([
         ('pending', 'Pending'),
         ('partial', 'Partially Shipped'),
         ('shipped', 'Fully Shipped'),
-    ], string='Line Status', compute='_compute_line_shipment_status', store=True)
+    ], string='Line Status', compute='_compute_shipment_variance', store=True)
 
     @api.depends('quantity', 'unit_price')
     def _compute_subtotal(self):
         for line in self:
             line.subtotal = line.quantity * line.unit_price
 
-    @api.depends('quantity', 'manual_shipped_qty')
-    def _compute_qty_diff_manual(self):
-        for line in self:
-            if line.manual_shipped_qty and line.manual_shipped_qty > 0:
-                line.qty_diff_manual = line.quantity - line.manual_shipped_qty
+    def _compute_shipment_variance(self):
+        """Also derive line_shipment_status, one batch assignment per status"""
+        super(DistributorPurchaseOrderLine, self)._compute_shipment_variance()
+        statuses = {'pending': [], 'partial': [], 'shipped': []}
+        quantities = self.mapped('quantity')
+        shipped = self.mapped('manual_shipped_qty')
+        for record_id, quantity, shipped_qty in zip(self._ids, quantities, shipped):
+            if not shipped_qty:
+                statuses['pending'].append(record_id)
+            elif shipped_qty >= quantity:
+                statuses['shipped'].append(record_id)
             else:
-                line.qty_diff_manual = 0.0
+                statuses['partial'].append(record_id)
+        for status, record_ids in statuses.items():
+            if record_ids:
+                self.browse(record_ids).line_shipment_status = status
 
-    @api.depends('manual_shipped_qty', 'quantity')
-    def _compute_manual_adjusted(self):
-        for line in self:
-            line.manual_adjusted = (
-                bool(line.manual_shipped_qty) and
-                line.manual_shipped_qty != line.quantity
-            )
-
-    @api.depends('quantity', 'manual_shipped_qty')
-    def _compute_line_shipment_status(self):
-        for line in self:
-            if not line.manual_shipped_qty or line.manual_shipped_qty == 0:
-                line.line_shipment_status = 'pending'
-            elif line.manual_shipped_qty >= line.quantity:
-                line.line_shipment_status = 'shipped'
-            else:
-                line.line_shipment_status = 'partial'
-
-    def write(self, vals):
-        """Track when manual_shipped_qty is modified"""
-        if 'manual_shipped_qty' in vals:
-            vals = dict(vals)
-            vals['adjustment_date'] = fields.Datetime.now()
-            vals['adjustment_user_id'] = self.env.user.id
-        return super(DistributorPurchaseOrderLine, self).write(vals)
-
-    @api.constrains('manual_shipped_qty')
-    def _check_manual_shipped_qty(self):
-        for line in self:
-            if line.manual_shipped_qty and line.manual_shipped_qty < 0:
-                raise ValidationError(
-                    "Manual shipped quantity cannot be negative for product '{}'.".format(
-                        line.product_id.name or ''
-                    )
-                )
-    
     @api.onchange('product_id')
     def _onchange_product_id(self):
         """Set default unit price when product changes"""
         if self.product_id:
             self.unit_price = self.product_id.list_price
+
+    # =====================================================
+    # BULK UPDATE
+    # =====================================================
+    @api.model
+    def bulk_update_lines(self, updates, chunk_size=10000):
+        """
+        Set-based mass update of line quantities.
+
+        updates: list of dicts {'id': line id, 'quantity': float (optional),
+                                'manual_shipped_qty': float (optional),
+                                'adjustment_note': str (optional)}
+
+        The inputs are written and subtotal, qty_diff_manual, manual_adjusted,
+        line_shipment_status and the orders' total_amount are recomputed with
+        SQL UPDATE statements (one set per chunk) that mirror the Python
+        computes. The ORM cache is then invalidated and fields depending on
+        the order totals are marked for recomputation.
+
+        Returns: number of updated lines
+        """
+        if not updates:
+            return 0
+        self.check_access_rights('write')
+        precision = self.env['decimal.precision'].precision_get('Product Unit of Measure')
+
+        rows = {}
+        for update in updates:
+            line_id = int(update['id'])
+            row = rows.setdefault(line_id, {})
+            if update.get('quantity') is not None:
+                row['quantity'] = float(update['quantity'])
+            if update.get('manual_shipped_qty') is not None:
+                manual_shipped_qty = float_round(float(update['manual_shipped_qty']), precision_digits=precision)
+                if manual_shipped_qty < 0:
+                    raise ValidationError(
+                        "Manual shipped quantity cannot be negative (line {}).".format(line_id)
+                    )
+                row['manual_shipped_qty'] = manual_shipped_qty
+            if 'adjustment_note' in update:
+                row['adjustment_note'] = update['adjustment_note'] or None
+
+        lines = self.browse(list(rows)).exists()
+        lines.check_access_rule('write')
+        self.flush_model()
+        self.env['distributor.purchase.order'].flush_model(['total_amount'])
+
+        for chunk_ids in split_every(chunk_size, lines.ids):
+            self._bulk_write_quantities(chunk_ids, rows, precision)
+
+        self.invalidate_model([
+            'quantity', 'manual_shipped_qty', 'adjustment_note', 'adjustment_date', 'adjustment_user_id', 'subtotal',
+            'qty_diff_manual', 'manual_adjusted', 'line_shipment_status',
+        ])
+        orders = lines.order_id
+        orders.invalidate_recordset(['total_amount'])
+        orders.modified(['total_amount'])
+        return len(lines)
+
+    @api.model
+    def _bulk_write_manual_shipments(self, updates):
+        """Go through bulk_update_lines, which also maintains the subtotals, order totals and milestones"""
+        self.bulk_update_lines([dict(vals, id=line_id) for line_id, vals in updates.items()])
+
+    def _bulk_write_quantities(self, line_ids, rows, precision):
+        """Write the inputs of ``line_ids`` then recompute their stored fields in SQL"""
+        cr = self.env.cr
+        shipped_ids = [line_id for line_id in line_ids if 'manual_shipped_qty' in rows[line_id]]
+        previous = {}
+        if shipped_ids:
+            cr.execute("""
+                SELECT id, COALESCE(manual_shipped_qty, 0), adjustment_note
+                  FROM distributor_purchase_order_line
+                 WHERE id = ANY(%s)
+            """, [shipped_ids])
+            previous = {line_id: (qty, note) for line_id, qty, note in cr.fetchall()}
+        lines = self.browse(line_ids)
+        lines._update_variance_rollup(-1)
+        cr.execute("""
+            UPDATE distributor_purchase_order_line line
+               SET quantity = CASE WHEN v.has_qty THEN v.qty ELSE line.quantity END,
+                   manual_shipped_qty = CASE WHEN v.has_shipped THEN v.shipped ELSE line.manual_shipped_qty END,
+                   adjustment_note = CASE WHEN v.has_note THEN v.note ELSE line.adjustment_note END,
+                   adjustment_date = CASE WHEN v.has_shipped THEN now() at time zone 'UTC' ELSE line.adjustment_date END,
+                   adjustment_user_id = CASE WHEN v.has_shipped THEN %(uid)s ELSE line.adjustment_user_id END,
+                   write_uid = %(uid)s,
+                   write_date = now() at time zone 'UTC'
+              FROM unnest(%(ids)s::int[], %(has_qty)s::bool[], %(qty)s::float8[],
+                          %(has_shipped)s::bool[], %(shipped)s::numeric[],
+                          %(has_note)s::bool[], %(note)s::varchar[])
+                   AS v(id, has_qty, qty, has_shipped, shipped, has_note, note)
+             WHERE line.id = v.id
+        """, {
+            'uid': self.env.uid,
+            'ids': list(line_ids),
+            'has_qty': ['quantity' in rows[line_id] for line_id in line_ids],
+            'qty': [rows[line_id].get('quantity') for line_id in line_ids],
+            'has_shipped': ['manual_shipped_qty' in rows[line_id] for line_id in line_ids],
+            'shipped': [rows[line_id].get('manual_shipped_qty') for line_id in line_ids],
+            'has_note': ['adjustment_note' in rows[line_id] for line_id in line_ids],
+            'note': [rows[line_id].get('adjustment_note') for line_id in line_ids],
+        })
+        changed = [
+            (line_id, previous[line_id][0], rows[line_id]['manual_shipped_qty'],
+             rows[line_id].get('adjustment_note', previous[line_id][1]))
+            for line_id in shipped_ids
+            if line_id in previous and float(previous[line_id][0]) != rows[line_id]['manual_shipped_qty']
+        ]
+        if changed:
+            ids, old_qtys, new_qtys, notes = zip(*changed)
+            self.env['shipment.adjustment.log'].sudo()._log_adjustments(self._name, ids, old_qtys, new_qtys, notes)
+        # Same rules as _compute_subtotal and _compute_shipment_variance
+        cr.execute("""
+            UPDATE distributor_purchase_order_line
+               SET subtotal = quantity * unit_price,
+                   qty_diff_manual = CASE
+                        WHEN manual_shipped_qty > 0 THEN ROUND((quantity - manual_shipped_qty)::numeric, %(precision)s)
+                        ELSE 0 END,
+                   manual_adjusted = COALESCE(manual_shipped_qty, 0) != 0 AND manual_shipped_qty != quantity,
+                   line_shipment_status = CASE
+                        WHEN COALESCE(manual_shipped_qty, 0) = 0 THEN 'pending'
+                        WHEN manual_shipped_qty >= quantity THEN 'shipped'
+                        ELSE 'partial' END
+             WHERE id IN %(ids)s
+        """, {'ids': tuple(line_ids), 'precision': precision})
+        lines._update_variance_rollup(1)
+        cr.execute("""
+            UPDATE distributor_purchase_order o
+               SET total_amount = totals.total
+              FROM (
+                    SELECT order_id, COALESCE(SUM(subtotal), 0) AS total
+                      FROM distributor_purchase_order_line
+                     WHERE order_id IN (SELECT order_id FROM distributor_purchase_order_line WHERE id IN %(ids)s)
+                  GROUP BY order_id
+                   ) totals
+             WHERE o.id = totals.order_id
+        """, {'ids': tuple(line_ids)})
@@ -0,0 +1,252 @@
+import csv
+import io
+import logging
+
+from odoo import models, fields, api
+from odoo.tools import split_every
+
+_logger = logging.getLogger(__name__)
+
+CSV_COLUMNS = ('order_ref', 'distributor_ref', 'order_date', 'product_code', 'quantity', 'unit_price', 'notes')
+
+
+class DistributorPurchaseOrder(models.Model):
+    _inherit = 'distributor.purchase.order'
+
+    # =====================================================
+    # BULK IMPORT API
+    # =====================================================
+    @api.model
+    def import_orders(self, orders, chunk_size=500):
+        """
+        Bulk import of distributor purchase orders.
+
+        orders: list of dicts with keys:
+            ref (optional client key echoed back in the report),
+            distributor_id (int) or distributor_ref (partner reference),
+            order_date (optional), notes (optional),
+            lines: list of dicts with product_id (int) or product_code (internal reference),
+                   quantity, unit_price (optional, defaults to the product sales price)
+        Every order and line may carry a 'row' key used in the error report
+        instead of its position.
+
+        Distributors and products are validated in bulk, order names are
+        reserved from the sequence in one block, and orders and lines are
+        created with chunked multi-record creates. An order with an invalid
+        line is rejected as a whole; the other orders are still imported.
+
+        Returns: {'created': [{'row', 'ref', 'id', 'name'}], 'errors': [{'row', 'line', 'ref', 'error'}]}
+        """
+        distributors, products = self._import_resolve_references(orders)
+
+        valid, errors = [], []
+        for index, order in enumerate(orders):
+            order_vals, order_errors = self._import_prepare_order(order, index, distributors, products)
+            if order_errors:
+                errors.extend(order_errors)
+            else:
+                valid.append((index, order, order_vals))
+
+        names = self._reserve_order_names(len(valid))
+        for (index, order, order_vals), name in zip(valid, names):
+            order_vals['name'] = name
+
+        created = []
+        for chunk in split_every(chunk_size, valid):
+            chunk_created, chunk_errors = self._import_create_chunk(chunk)
+            created.extend(chunk_created)
+            errors.extend(chunk_errors)
+
+        _logger.info("Imported %s distributor purchase order(s), %s error(s)", len(created), len(errors))
+        return {'created': created, 'errors': errors}
+
+    @api.model
+    def import_orders_csv(self, content, chunk_size=500):
+        """
+        Bulk import from CSV text with the columns of ``CSV_COLUMNS``.
+
+        Consecutive rows sharing the same order_ref form one order; errors
+        reference the CSV line number.
+        """
+        reader = csv.DictReader(io.StringIO(content))
+        orders = []
+        current_ref = None
+        for row_number, row in enumerate(reader, start=2):
+            row = {key: (value or '').strip() for key, value in row.items() if key}
+            order_ref = row.get('order_ref') or 'row-%s' % row_number
+            if order_ref != current_ref:
+                current_ref = order_ref
+                orders.append({
+                    'row': row_number,
+                    'ref': order_ref,
+                    'distributor_ref': row.get('distributor_ref'),
+                    'order_date': row.get('order_date') or False,
+                    'notes': row.get('notes') or False,
+                    'lines': [],
+                })
+            orders[-1]['lines'].append({
+                'row': row_number,
+                'product_code': row.get('product_code'),
+                'quantity': row.get('quantity'),
+                'unit_price': row.get('unit_price') or None,
+            })
+        return self.import_orders(orders, chunk_size=chunk_size)
+
+    @api.model
+    def _import_resolve_references(self, orders):
+        """Fetch every distributor and product referenced by ``orders`` in two searches"""
+        distributor_ids, distributor_refs, product_ids, product_codes = set(), set(), set(), set()
+        for order in orders:
+            if order.get('distributor_id'):
+                distributor_ids.add(order['distributor_id'])
+            elif order.get('distributor_ref'):
+                distributor_refs.add(order['distributor_ref'])
+            for line in order.get('lines') or []:
+                if line.get('product_id'):
+                    product_ids.add(line['product_id'])
+                elif line.get('product_code'):
+                    product_codes.add(line['product_code'])
+
+        partners = self.env['res.partner'].search([
+            ('is_distributor', '=', True),
+            '|', ('id', 'in', list(distributor_ids)), ('ref', 'in', list(distributor_refs)),
+        ]) if distributor_ids or distributor_refs else self.env['res.partner']
+        distributors = {}
+        for partner in partners:
+            distributors[partner.id] = partner.id
+            if partner.ref:
+                distributors.setdefault(partner.ref, partner.id)
+
+        records = self.env['product.product'].search([
+            ('type', '=', 'product'),
+            '|', ('id', 'in', list(product_ids)), ('default_code', 'in', list(product_codes)),
+        ]) if product_ids or product_codes else self.env['product.product']
+        products = {}
+        for product in records:
+            products[product.id] = product
+            if product.default_code:
+                products.setdefault(product.default_code, product)
+        return distributors, products
+
+    @api.model
+    def _import_prepare_order(self, order, index, distributors, products):
+        """Validate one order payload and return (order values, errors)"""
+        row = order.get('row', index)
+        errors = []
+
+        def error(message, line=None, line_index=None):
+            errors.append({
+                'row': line.get('row', row) if line else row,
+                'line': line_index,
+                'ref': order.get('ref'),
+                'error': message,
+            })
+
+        distributor_key = order.get('distributor_id') or order.get('distributor_ref')
+        distributor_id = distributors.get(distributor_key)
+        if not distributor_id:
+            error("Unknown distributor '%s'" % (distributor_key or ''))
+
+        try:
+            order_date = fields.Datetime.to_datetime(order.get('order_date')) or fields.Datetime.now()
+        except ValueError:
+            order_date = None
+            error("Invalid order date '%s'" % order.get('order_date'))
+
+        lines = order.get('lines') or []
+        if not lines:
+            error("Order has no lines")
+
+        line_vals_list = []
+        for line_index, line in enumerate(lines):
+            product_key = line.get('product_id') or line.get('product_code')
+            product = products.get(product_key)
+            if not product:
+                error("Unknown product '%s'" % (product_key or ''), line, line_index)
+                continue
+            try:
+                quantity = float(line.get('quantity'))
+                unit_price = float(line['unit_price']) if line.get('unit_price') not in (None, '') \
+                    else product.list_price
+            except (TypeError, ValueError):
+                error("Invalid quantity or unit price for product '%s'" % product_key, line, line_index)
+                continue
+            if quantity <= 0:
+                error("Quantity must be positive for product '%s'" % product_key, line, line_index)
+                continue
+            line_vals_list.append({
+                'product_id': product.id,
+                'quantity': quantity,
+                'unit_price': unit_price,
+            })
+
+        return {
+            'distributor_id': distributor_id,
+            'order_date': order_date,
+            'notes': order.get('notes') or False,
+            'lines': line_vals_list,
+        }, errors
+
+    @api.model
+    def _import_create_chunk(self, chunk):
+        """Create a chunk of validated orders, isolating failures per order"""
+        try:
+            with self.env.cr.savepoint():
+                return self._import_create_orders(chunk), []
+        except Exception:
+            self.env.invalidate_all()
+            _logger.info("Import chunk of %s orders failed, retrying order by order", len(chunk))
+
+        created, errors = [], []
+        for item in chunk:
+            index, order, order_vals = item
+            try:
+                with self.env.cr.savepoint():
+                    created.extend(self._import_create_orders([item]))
+            except Exception as e:
+                self.env.invalidate_all()
+                errors.append({'row': order.get('row', index), 'line': None, 'ref': order.get('ref'), 'error': str(e)})
+        return created, errors
+
+    @api.model
+    def _import_create_orders(self, items):
+        """One multi-record create for the orders, one for all of their lines"""
+        records = self.create([
+            {key: value for key, value in order_vals.items() if key != 'lines'}
+            for index, order, order_vals in items
+        ])
+        self.env['distributor.purchase.order.line'].create([
+            dict(line_vals, order_id=record.id)
+            for record, (index, order, order_vals) in zip(records, items)
+            for line_vals in order_vals['lines']
+        ])
+        records.flush_recordset()
+        return [
+            {'row': order.get('row', index), 'ref': order.get('ref'), 'id': record.id, 'name': record.name}
+            for record, (index, order, order_vals) in zip(records, items)
+        ]
+
+    @api.model
+    def _reserve_order_names(self, count):
+        """Reserve ``count`` order references from the sequence in one block.
+
+        Standard (PostgreSQL sequence backed) implementations draw all numbers
+        with a single ``nextval`` over ``generate_series``; other
+        implementations fall back to one ``next_by_code`` call per name.
+        """
+        if not count:
+            return []
+        sequence = self.env['ir.sequence'].sudo().search([
+            ('code', '=', 'distributor.purchase.order'),
+            ('company_id', 'in', [self.env.company.id, False]),
+        ], order='company_id', limit=1)
+        if not sequence:
+            return ['New'] * count
+        if sequence.implementation != 'standard' or sequence.use_date_range:
+            return [sequence._next() for _i in range(count)]
+        self.env.cr.execute(
+            "SELECT nextval(%s) FROM generate_series(1, %s)",
+            ['ir_sequence_%03d' % sequence.id, count]
+        )
+        numbers = sorted(row[0] for row in self.env.cr.fetchall())
+        return [sequence.get_next_char(number) for number in numbers]
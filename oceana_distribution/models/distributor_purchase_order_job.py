@@ -0,0 +1,172 @@
+import logging
+from datetime import timedelta
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+
+class DistributorPurchaseOrderJob(models.Model):
+    _name = 'distributor.purchase.order.job'
+    _description = 'Distributor Purchase Order Stock Move Job'
+    _order = 'next_attempt_date, id'
+    _rec_name = 'order_id'
+
+    order_id = fields.Many2one(
+        'distributor.purchase.order',
+        string='Order',
+        required=True,
+        index=True,
+        ondelete='cascade'
+    )
+
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled')
+    ], string='Status', default='pending', required=True, index=True)
+
+    attempts = fields.Integer(string='Attempts', default=0, readonly=True)
+
+    max_attempts = fields.Integer(string='Max Attempts', default=3)
+
+    next_attempt_date = fields.Datetime(
+        string='Next Attempt',
+        default=fields.Datetime.now,
+        index=True
+    )
+
+    date_done = fields.Datetime(string='Processed On', readonly=True)
+
+    error = fields.Text(string='Last Error', readonly=True)
+
+    def init(self):
+        # at most one pending job per order; drop duplicates queued before the index existed
+        self.env.cr.execute("""
+            DELETE FROM distributor_purchase_order_job job
+             USING distributor_purchase_order_job kept
+             WHERE job.state = 'pending'
+               AND kept.state = 'pending'
+               AND kept.order_id = job.order_id
+               AND kept.id < job.id
+        """)
+        self.env.cr.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS distributor_purchase_order_job_pending_uniq
+                ON distributor_purchase_order_job (order_id)
+             WHERE state = 'pending'
+        """)
+
+    @api.model
+    def _enqueue(self, orders):
+        """Queue stock move generation for ``orders``, skipping orders already queued"""
+        queued = self.search([('order_id', 'in', orders.ids), ('state', '=', 'pending')]).order_id
+        jobs = self.create([{'order_id': order.id} for order in orders - queued])
+        orders.write({'stock_processing_state': 'queued', 'stock_processing_error': False})
+        self.env.ref('oceana_distribution.ir_cron_distributor_stock_move_jobs')._trigger()
+        return jobs
+
+    @api.model
+    def _claim_pending(self, limit):
+        """Lock up to ``limit`` due jobs, skipping the ones another worker holds.
+
+        ``SKIP LOCKED`` lets several cron workers drain the queue in parallel
+        without processing the same order twice.
+        """
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT id
+              FROM distributor_purchase_order_job
+             WHERE state = 'pending'
+               AND next_attempt_date <= (now() at time zone 'UTC')
+          ORDER BY next_attempt_date, id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+        """, (limit,))
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    @api.model
+    def _cron_process_queue(self, batch_size=None):
+        """Process one batch of queued orders, re-triggering the cron while jobs remain"""
+        if batch_size is None:
+            batch_size = int(self.env['ir.config_parameter'].sudo().get_param(
+                'oceana_distribution.stock_move_job_batch_size', 50))
+        jobs = self._claim_pending(batch_size)
+        if not jobs:
+            return
+        jobs._run()
+        if self.search_count([('state', '=', 'pending'), ('next_attempt_date', '<=', fields.Datetime.now())]):
+            self.env.ref('oceana_distribution.ir_cron_distributor_stock_move_jobs')._trigger()
+
+    def _run(self):
+        """Generate the stock moves of the jobs' orders.
+
+        Orders cancelled or reset to draft since they were queued are skipped
+        and their jobs cancelled. The batch is first processed as a whole; if
+        it fails, every order is retried on its own so a single faulty order
+        only fails its own job.
+        """
+        stale = self.filtered(lambda job: job.order_id.state != 'confirmed')
+        stale._mark_cancelled()
+        jobs = self - stale
+        if not jobs:
+            return
+        try:
+            with self.env.cr.savepoint():
+                jobs.order_id._create_stock_moves()
+        except Exception:
+            self.env.invalidate_all()
+            _logger.info("Batch of %s stock move jobs failed, processing orders one by one", len(jobs))
+        else:
+            jobs._mark_done()
+            return
+
+        for job in jobs:
+            try:
+                with self.env.cr.savepoint():
+                    job.order_id._create_stock_moves()
+            except Exception as e:
+                self.env.invalidate_all()
+                _logger.warning("Stock move job %s for order %s failed", job.id, job.order_id.id, exc_info=True)
+                job._mark_failed(str(e))
+            else:
+                job._mark_done()
+
+    def _mark_done(self):
+        self.write({'state': 'done', 'date_done': fields.Datetime.now(), 'error': False})
+        self.order_id.write({'stock_processing_state': 'done', 'stock_processing_error': False})
+
+    def _mark_cancelled(self):
+        """Close the jobs of orders that are no longer confirmed"""
+        if not self:
+            return
+        self.write({'state': 'cancelled', 'date_done': fields.Datetime.now(), 'error': "Order is no longer confirmed"})
+        self.order_id.write({'stock_processing_state': False, 'stock_processing_error': False})
+
+    def _mark_failed(self, error):
+        """Schedule a retry with linear backoff, or give up after ``max_attempts``.
+
+        The error is shown on the order from the first failure on, while the
+        order stays queued until its last attempt.
+        """
+        self.ensure_one()
+        attempts = self.attempts + 1
+        if attempts >= self.max_attempts:
+            self.write({'state': 'failed', 'attempts': attempts, 'error': error})
+            self.order_id.write({'stock_processing_state': 'failed', 'stock_processing_error': error})
+        else:
+            self.write({
+                'attempts': attempts,
+                'error': error,
+                'next_attempt_date': fields.Datetime.now() + timedelta(minutes=5 * attempts),
+            })
+            self.order_id.write({'stock_processing_error': error})
+
+    def action_retry(self):
+        """Button: put failed jobs back in the queue"""
+        pending = self.search([('order_id', 'in', self.order_id.ids), ('state', '=', 'pending')]).order_id
+        self = self.filtered(lambda job: job.state != 'pending' and job.order_id not in pending)
+        self.write({'state': 'pending', 'attempts': 0, 'next_attempt_date': fields.Datetime.now()})
+        self.order_id.write({'stock_processing_state': 'queued'})
+        self.env.ref('oceana_distribution.ir_cron_distributor_stock_move_jobs')._trigger()
+        return True
@@ -0,0 +1,241 @@
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+
+MILESTONES = [
+    ('draft', 'Draft'),
+    ('payment_pending', 'Payment Pending'),
+    ('confirmed', 'Payment Confirmed'),
+    ('partial_shipped', 'Partially Shipped'),
+    ('shipped', 'Shipped'),
+    ('excess_shipped', 'Excess Shipped'),
+    ('delivered', 'Delivered'),
+]
+
+# Allowed x_delivery_milestone transitions: current milestone -> next milestones.
+# Shipping milestones can move between each other as shipped quantities are corrected.
+MILESTONE_TRANSITIONS = {
+    'draft': ('payment_pending', 'confirmed'),
+    'payment_pending': ('draft', 'confirmed'),
+    'confirmed': ('payment_pending', 'partial_shipped', 'shipped', 'excess_shipped'),
+    'partial_shipped': ('shipped', 'excess_shipped', 'delivered'),
+    'shipped': ('partial_shipped', 'excess_shipped', 'delivered'),
+    'excess_shipped': ('partial_shipped', 'shipped', 'delivered'),
+    'delivered': (),
+}
+
+
+class DistributorPurchaseOrder(models.Model):
+    _inherit = 'distributor.purchase.order'
+
+    milestone_history_ids = fields.One2many(
+        'distributor.purchase.order.milestone.history',
+        'order_id',
+        string='Milestone History'
+    )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        orders = super(DistributorPurchaseOrder, self).create(vals_list)
+        orders._log_milestone_transitions({order.id: False for order in orders})
+        return orders
+
+    def write(self, vals):
+        """Validate x_delivery_milestone transitions and record them in the history"""
+        if 'x_delivery_milestone' not in vals:
+            return super(DistributorPurchaseOrder, self).write(vals)
+        milestone = vals['x_delivery_milestone']
+        changed = self.filtered(lambda o: o.x_delivery_milestone != milestone)
+        changed._check_milestone_transition(milestone)
+        previous = {order.id: order.x_delivery_milestone for order in changed}
+        result = super(DistributorPurchaseOrder, self).write(vals)
+        changed._log_milestone_transitions(previous)
+        return result
+
+    def _check_milestone_transition(self, milestone):
+        """Raise if any order of ``self`` cannot move to ``milestone``"""
+        invalid = self.filtered(
+            lambda o: milestone not in MILESTONE_TRANSITIONS.get(o.x_delivery_milestone or 'draft', ())
+        )
+        if invalid:
+            labels = dict(MILESTONES)
+            raise UserError("Cannot move to milestone '{}' from the current milestone of: {}".format(
+                labels.get(milestone, milestone),
+                ', '.join('%s (%s)' % (o.name, labels.get(o.x_delivery_milestone, o.x_delivery_milestone))
+                          for o in invalid[:20])
+            ))
+
+    def _apply_milestone_transition(self, milestone):
+        """Move all orders to ``milestone`` with one batched write, validated by ``write``"""
+        self.filtered(lambda o: o.x_delivery_milestone != milestone).write({'x_delivery_milestone': milestone})
+        return True
+
+    def _log_milestone_transitions(self, previous):
+        """Append one history row per order with a single INSERT.
+
+        previous: {order id: milestone before the change (False on creation)}
+        """
+        if not self:
+            return
+        self.flush_recordset(['x_delivery_milestone'])
+        self.env.cr.execute("""
+            INSERT INTO distributor_purchase_order_milestone_history
+                   (order_id, from_milestone, to_milestone, user_id, date)
+            SELECT o.id, prev.milestone, o.x_delivery_milestone, %(uid)s, now() at time zone 'UTC'
+              FROM unnest(%(ids)s::int[], %(previous)s::varchar[]) AS prev(order_id, milestone)
+              JOIN distributor_purchase_order o ON o.id = prev.order_id
+        """, {
+            'uid': self.env.uid,
+            'ids': self.ids,
+            'previous': [previous.get(order_id) or None for order_id in self.ids],
+        })
+        self.invalidate_recordset(['milestone_history_ids'])
+
+    # Milestones the line-derived shipping milestone may replace
+    _DERIVABLE_MILESTONES = ('confirmed', 'partial_shipped', 'shipped', 'excess_shipped')
+
+    def _sync_milestone_from_lines(self, all_orders=False):
+        """Derive the shipping milestone of orders from their line aggregates.
+
+        One grouped query over the lines of ``self`` (or of every order with
+        ``all_orders``, for the sweep cron) finds the orders whose milestone
+        differs from the derived one:
+
+        * excess_shipped when the total shipped exceeds the total ordered,
+        * shipped when every line is fully shipped,
+        * partial_shipped when something but not everything was shipped.
+
+        Only orders past payment confirmation and not yet delivered are
+        considered, and orders without any shipped quantity are left alone.
+        The changes are applied with one transition write per target milestone.
+        """
+        if not self and not all_orders:
+            return True
+        self.env['distributor.purchase.order.line'].flush_model(['order_id', 'quantity', 'manual_shipped_qty'])
+        self.flush_model(['x_delivery_milestone'])
+        params = {'milestones': self._DERIVABLE_MILESTONES}
+        order_filter = ''
+        if not all_orders:
+            order_filter = 'AND o.id IN %(ids)s'
+            params['ids'] = tuple(self.ids)
+        self.env.cr.execute("""
+            SELECT id, derived
+              FROM (
+                    SELECT o.id, o.x_delivery_milestone AS current,
+                           CASE
+                               WHEN SUM(COALESCE(l.manual_shipped_qty, 0)) = 0 THEN NULL
+                               WHEN SUM(COALESCE(l.manual_shipped_qty, 0)) > SUM(l.quantity) THEN 'excess_shipped'
+                               WHEN bool_and(COALESCE(l.manual_shipped_qty, 0) >= l.quantity) THEN 'shipped'
+                               ELSE 'partial_shipped'
+                           END AS derived
+                      FROM distributor_purchase_order o
+                      JOIN distributor_purchase_order_line l ON l.order_id = o.id
+                     WHERE o.x_delivery_milestone IN %(milestones)s
+                       {order_filter}
+                  GROUP BY o.id
+                   ) aggregates
+             WHERE derived IS NOT NULL
+               AND derived != current
+        """.format(order_filter=order_filter), params)
+        by_milestone = {}
+        for order_id, milestone in self.env.cr.fetchall():
+            by_milestone.setdefault(milestone, []).append(order_id)
+        for milestone, order_ids in by_milestone.items():
+            self.browse(order_ids)._apply_milestone_transition(milestone)
+        return True
+
+    @api.model
+    def _cron_sync_milestones(self):
+        """Scheduled sweep deriving the milestone of every order from its lines"""
+        return self.browse()._sync_milestone_from_lines(all_orders=True)
+
+    @api.model
+    def get_milestone_timing_metrics(self, domain=None):
+        """
+        Time spent in each delivery milestone, from the transition history.
+
+        domain: optional domain on distributor.purchase.order
+        Returns: list of dicts {milestone, entries, exits, current_count,
+                 avg_hours, min_hours, max_hours} where durations are computed on
+                 completed stays only.
+        """
+        query = self._where_calc(domain or [])
+        self._apply_ir_rules(query, 'read')
+        order_sql, order_params = query.select('"distributor_purchase_order"."id"')
+        self.env['distributor.purchase.order.milestone.history'].flush_model()
+        self.env.cr.execute("""
+            WITH stays AS (
+                SELECT h.to_milestone AS milestone,
+                       h.date AS entered,
+                       LEAD(h.date) OVER (PARTITION BY h.order_id ORDER BY h.date, h.id) AS left_at
+                  FROM distributor_purchase_order_milestone_history h
+                 WHERE h.order_id IN ({orders})
+            )
+            SELECT milestone,
+                   COUNT(*) AS entries,
+                   COUNT(left_at) AS exits,
+                   COUNT(*) - COUNT(left_at) AS current_count,
+                   (AVG(EXTRACT(EPOCH FROM left_at - entered)) / 3600.0)::float8 AS avg_hours,
+                   (MIN(EXTRACT(EPOCH FROM left_at - entered)) / 3600.0)::float8 AS min_hours,
+                   (MAX(EXTRACT(EPOCH FROM left_at - entered)) / 3600.0)::float8 AS max_hours
+              FROM stays
+          GROUP BY milestone
+        """.format(orders=order_sql), order_params)
+        metrics = {row['milestone']: row for row in self.env.cr.dictfetchall()}
+        return [metrics[milestone] for milestone, _label in MILESTONES if milestone in metrics]
+
+
+class DistributorPurchaseOrderMilestoneHistory(models.Model):
+    _name = 'distributor.purchase.order.milestone.history'
+    _description = 'Distributor Purchase Order Milestone Transition'
+    _order = 'date desc, id desc'
+    _log_access = False
+
+    order_id = fields.Many2one(
+        'distributor.purchase.order',
+        string='Order',
+        required=True,
+        index=True,
+        ondelete='cascade'
+    )
+    from_milestone = fields.Selection(MILESTONES, string='From', readonly=True)
+    to_milestone = fields.Selection(MILESTONES, string='To', required=True, readonly=True)
+    user_id = fields.Many2one('res.users', string='User', readonly=True)
+    date = fields.Datetime(string='Date', required=True, readonly=True, index=True)
+
+    def init(self):
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS distributor_po_milestone_history_order_date_idx
+                ON distributor_purchase_order_milestone_history (order_id, date)
+        """)
+
+
+class DistributorPurchaseOrderLine(models.Model):
+    _inherit = 'distributor.purchase.order.line'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super(DistributorPurchaseOrderLine, self).create(vals_list)
+        if not self.env.context.get('skip_milestone_sync'):
+            lines.order_id._sync_milestone_from_lines()
+        return lines
+
+    def write(self, vals):
+        result = super(DistributorPurchaseOrderLine, self).write(vals)
+        if ('quantity' in vals or 'manual_shipped_qty' in vals) and not self.env.context.get('skip_milestone_sync'):
+            self.order_id._sync_milestone_from_lines()
+        return result
+
+    def unlink(self):
+        orders = self.order_id
+        result = super(DistributorPurchaseOrderLine, self).unlink()
+        if not self.env.context.get('skip_milestone_sync'):
+            orders.exists()._sync_milestone_from_lines()
+        return result
+
+    @api.model
+    def bulk_update_lines(self, updates, chunk_size=10000):
+        count = super(DistributorPurchaseOrderLine, self).bulk_update_lines(updates, chunk_size=chunk_size)
+        if count and not self.env.context.get('skip_milestone_sync'):
+            line_ids = [int(update['id']) for update in updates]
+            self.browse(line_ids).exists().order_id._sync_milestone_from_lines()
+        return count
@@ -0,0 +1,140 @@
+from collections import defaultdict
+
+from odoo import models, fields, api
+
+
+class DistributorStockLevel(models.Model):
+    _name = 'distributor.stock.level'
+    _description = 'Distributor Stock Level Snapshot'
+    _order = 'distributor_id, product_id'
+
+    distributor_id = fields.Many2one(
+        'res.partner',
+        string='Distributor',
+        required=True,
+        index=True,
+        ondelete='cascade'
+    )
+
+    product_id = fields.Many2one(
+        'product.product',
+        string='Product',
+        required=True,
+        index=True,
+        ondelete='cascade'
+    )
+
+    location_id = fields.Many2one('stock.location', string='Location')
+
+    quantity = fields.Float(
+        string='Quantity',
+        digits='Product Unit of Measure',
+        help='On hand quantity in the product unit of measure'
+    )
+
+    product_uom_id = fields.Many2one(related='product_id.uom_id', string='Unit of Measure')
+
+    last_move_date = fields.Datetime(string='Last Movement')
+
+    _sql_constraints = [
+        ('distributor_product_uniq', 'unique(distributor_id, product_id)',
+         'Only one stock level per distributor and product!')
+    ]
+
+    @api.model
+    def _apply_done_moves(self, moves):
+        """Add the done ``moves`` entering or leaving a distributor location to the snapshot.
+
+        Quantities are netted per (distributor, product) and applied with a
+        single upsert, so the snapshot never needs quant aggregation.
+        """
+        deltas = defaultdict(float)
+        locations = {}
+        dates = {}
+        for move in moves:
+            if move.state != 'done':
+                continue
+            source = move.location_id.distributor_id
+            destination = move.location_dest_id.distributor_id
+            if not source and not destination or source == destination:
+                continue
+            quantity = move.product_uom._compute_quantity(
+                move.quantity_done, move.product_id.uom_id, rounding_method='HALF-UP')
+            for distributor, location, sign in ((destination, move.location_dest_id, 1), (source, move.location_id, -1)):
+                if distributor:
+                    key = (distributor.id, move.product_id.id)
+                    deltas[key] += sign * quantity
+                    locations.setdefault(key, location.id)
+                    dates[key] = max(dates.get(key) or move.date, move.date)
+        if deltas:
+            self._upsert_quantities(deltas, locations, dates, increment=True)
+
+    def _upsert_quantities(self, quantities, locations, dates, increment):
+        """Write ``quantities`` {(distributor_id, product_id): qty} in one statement"""
+        self.flush_model()
+        keys = list(quantities)
+        quantity_sql = 'distributor_stock_level.quantity + EXCLUDED.quantity' if increment else 'EXCLUDED.quantity'
+        self.env.cr.execute("""
+            INSERT INTO distributor_stock_level
+                   (distributor_id, product_id, location_id, quantity, last_move_date,
+                    create_uid, create_date, write_uid, write_date)
+            SELECT d, p, l, q, m, %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+              FROM unnest(%(distributors)s::int[], %(products)s::int[], %(locations)s::int[],
+                          %(quantities)s::numeric[], %(dates)s::timestamp[]) AS t(d, p, l, q, m)
+            ON CONFLICT (distributor_id, product_id) DO UPDATE
+               SET quantity = {quantity},
+                   location_id = COALESCE(EXCLUDED.location_id, distributor_stock_level.location_id),
+                   last_move_date = GREATEST(EXCLUDED.last_move_date, distributor_stock_level.last_move_date),
+                   write_uid = EXCLUDED.write_uid,
+                   write_date = EXCLUDED.write_date
+        """.format(quantity=quantity_sql), {
+            'uid': self.env.uid,
+            'distributors': [key[0] for key in keys],
+            'products': [key[1] for key in keys],
+            'locations': [locations.get(key) for key in keys],
+            'quantities': [quantities[key] for key in keys],
+            'dates': [dates.get(key) for key in keys],
+        })
+        self.invalidate_model()
+
+    @api.model
+    def rebuild_snapshot(self):
+        """Recompute the whole snapshot from the quants of distributor locations.
+
+        Only needed to backfill or repair the snapshot; day-to-day updates come
+        from ``stock.move._action_done``.
+        """
+        self.env['stock.quant'].flush_model(['location_id', 'product_id', 'quantity', 'in_date'])
+        self.env['stock.location'].flush_model(['distributor_id'])
+        self.env.cr.execute("""
+            SELECT loc.distributor_id, quant.product_id, MIN(loc.id), SUM(quant.quantity), MAX(quant.in_date)
+              FROM stock_quant quant
+              JOIN stock_location loc ON loc.id = quant.location_id
+             WHERE loc.distributor_id IS NOT NULL
+          GROUP BY loc.distributor_id, quant.product_id
+        """)
+        quantities, locations, dates = {}, {}, {}
+        for distributor_id, product_id, location_id, quantity, date in self.env.cr.fetchall():
+            key = (distributor_id, product_id)
+            quantities[key] = quantity
+            locations[key] = location_id
+            dates[key] = date
+        self.env.cr.execute("DELETE FROM distributor_stock_level")
+        self.invalidate_model()
+        if quantities:
+            self._upsert_quantities(quantities, locations, dates, increment=False)
+        return True
+
+    @api.model
+    def get_stock_levels(self, distributor_ids, product_ids=None):
+        """API: stock levels of ``distributor_ids`` in one indexed read.
+
+        Returns: {distributor_id: {product_id: quantity}}
+        """
+        domain = [('distributor_id', 'in', distributor_ids)]
+        if product_ids:
+            domain.append(('product_id', 'in', product_ids))
+        result = defaultdict(dict)
+        for level in self.search_read(domain, ['distributor_id', 'product_id', 'quantity'], load=None):
+            result[level['distributor_id']][level['product_id']] = level['quantity']
+        return dict(result)
@@ -0,0 +1,204 @@
+import logging
+from collections import defaultdict
+
+from odoo import models, fields, api
+from odoo.tools import html_escape
+
+_logger = logging.getLogger(__name__)
+
+# Effective (distributor, product, min_qty) rules with the current snapshot
+# quantity. Distributor-specific thresholds win over global ones (no distributor).
+_EVALUATED_RULES_SQL = """
+    WITH rules AS (
+        SELECT DISTINCT ON (c.distributor_id, c.product_id)
+               c.distributor_id, c.product_id, c.min_qty, c.threshold_id
+          FROM (
+                SELECT t.distributor_id, t.product_id, t.min_qty, t.id AS threshold_id, FALSE AS is_global
+                  FROM distributor_stock_threshold t
+                 WHERE t.active AND t.distributor_id IS NOT NULL
+                 UNION ALL
+                SELECT rp.id, t.product_id, t.min_qty, t.id, TRUE
+                  FROM distributor_stock_threshold t
+                  JOIN res_partner rp ON rp.is_distributor AND rp.active
+                 WHERE t.active AND t.distributor_id IS NULL
+          ) c
+      ORDER BY c.distributor_id, c.product_id, c.is_global, c.threshold_id
+    ), evaluated AS (
+        SELECT r.distributor_id, r.product_id, r.min_qty, r.threshold_id,
+               COALESCE(l.quantity, 0) AS quantity
+          FROM rules r
+     LEFT JOIN distributor_stock_level l
+            ON l.distributor_id = r.distributor_id
+           AND l.product_id = r.product_id
+    )
+"""
+
+
+class DistributorStockThreshold(models.Model):
+    _name = 'distributor.stock.threshold'
+    _description = 'Distributor Low Stock Threshold'
+    _order = 'product_id, distributor_id'
+
+    distributor_id = fields.Many2one(
+        'res.partner',
+        string='Distributor',
+        index=True,
+        ondelete='cascade',
+        domain=[('is_distributor', '=', True)],
+        help='Leave empty to apply the threshold to every distributor without a specific one'
+    )
+
+    product_id = fields.Many2one(
+        'product.product',
+        string='Product',
+        required=True,
+        index=True,
+        ondelete='cascade'
+    )
+
+    min_qty = fields.Float(
+        string='Minimum Quantity',
+        digits='Product Unit of Measure',
+        required=True,
+        help='An alert is raised when the distributor stock falls below this quantity'
+    )
+
+    user_id = fields.Many2one(
+        'res.users',
+        string='Responsible',
+        help='User receiving the low stock activities (defaults to the distributor salesperson)'
+    )
+
+    active = fields.Boolean(default=True)
+
+    _sql_constraints = [
+        ('distributor_product_uniq', 'unique(distributor_id, product_id)',
+         'Only one threshold per distributor and product!')
+    ]
+
+    def init(self):
+        # unique(distributor_id, product_id) does not apply to global thresholds (NULL distributor)
+        self.env.cr.execute("""
+            DELETE FROM distributor_stock_threshold t
+             USING distributor_stock_threshold kept
+             WHERE t.distributor_id IS NULL
+               AND kept.distributor_id IS NULL
+               AND kept.product_id = t.product_id
+               AND kept.id < t.id
+        """)
+        if self.env.cr.rowcount:
+            _logger.warning("Removed %s duplicated global stock threshold(s)", self.env.cr.rowcount)
+        self.env.cr.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS distributor_stock_threshold_global_uniq
+                ON distributor_stock_threshold (product_id)
+             WHERE distributor_id IS NULL
+        """)
+
+    @api.model
+    def _cron_evaluate_thresholds(self):
+        """Evaluate every threshold against the stock snapshot in one set-based pass.
+
+        New alerts are only created for (distributor, product) pairs that went
+        below their threshold since the last run, and active alerts whose stock
+        recovered (or whose threshold disappeared) are resolved.
+        """
+        for model in ('distributor.stock.threshold', 'distributor.stock.level', 'distributor.stock.alert'):
+            self.env[model].flush_model()
+        self.env['res.partner'].flush_model(['is_distributor', 'active'])
+
+        cr = self.env.cr
+        cr.execute(_EVALUATED_RULES_SQL + """
+            INSERT INTO distributor_stock_alert
+                   (distributor_id, product_id, threshold_id, quantity, min_qty, state, date_alert,
+                    create_uid, create_date, write_uid, write_date)
+            SELECT e.distributor_id, e.product_id, e.threshold_id, e.quantity, e.min_qty, 'active',
+                   now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+              FROM evaluated e
+             WHERE e.quantity < e.min_qty
+               AND NOT EXISTS (
+                    SELECT 1
+                      FROM distributor_stock_alert a
+                     WHERE a.state = 'active'
+                       AND a.distributor_id = e.distributor_id
+                       AND a.product_id = e.product_id
+               )
+                ON CONFLICT DO NOTHING
+         RETURNING id
+        """, {'uid': self.env.uid})
+        new_alert_ids = [row[0] for row in cr.fetchall()]
+
+        cr.execute(_EVALUATED_RULES_SQL + """
+            UPDATE distributor_stock_alert a
+               SET state = 'resolved',
+                   date_resolved = now() at time zone 'UTC',
+                   write_uid = %(uid)s,
+                   write_date = now() at time zone 'UTC'
+             WHERE a.state = 'active'
+               AND NOT EXISTS (
+                    SELECT 1
+                      FROM evaluated e
+                     WHERE e.distributor_id = a.distributor_id
+                       AND e.product_id = a.product_id
+                       AND e.quantity < e.min_qty
+               )
+        """, {'uid': self.env.uid})
+        resolved_count = cr.rowcount
+
+        self.env['distributor.stock.alert'].invalidate_model()
+        new_alerts = self.env['distributor.stock.alert'].browse(new_alert_ids)
+        new_alerts._schedule_activities()
+        _logger.info("Low stock evaluation: %s new alert(s), %s resolved", len(new_alerts), resolved_count)
+        return True
+
+
+class DistributorStockAlert(models.Model):
+    _name = 'distributor.stock.alert'
+    _description = 'Distributor Low Stock Alert'
+    _order = 'date_alert desc, id desc'
+
+    distributor_id = fields.Many2one('res.partner', string='Distributor', required=True, index=True, ondelete='cascade')
+    product_id = fields.Many2one('product.product', string='Product', required=True, ondelete='cascade')
+    threshold_id = fields.Many2one('distributor.stock.threshold', string='Threshold', ondelete='set null')
+    quantity = fields.Float(string='Quantity', digits='Product Unit of Measure', help='Stock when the alert was raised')
+    min_qty = fields.Float(string='Minimum Quantity', digits='Product Unit of Measure')
+    state = fields.Selection([
+        ('active', 'Active'),
+        ('resolved', 'Resolved')
+    ], string='Status', default='active', required=True, index=True)
+    date_alert = fields.Datetime(string='Alert Date', default=fields.Datetime.now)
+    date_resolved = fields.Datetime(string='Resolved On')
+
+    def init(self):
+        # At most one active alert per pair; also backs the NOT EXISTS of the evaluator
+        self.env.cr.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS distributor_stock_alert_active_uniq
+                ON distributor_stock_alert (distributor_id, product_id)
+             WHERE state = 'active'
+        """)
+
+    def _schedule_activities(self):
+        """Create one 'To Do' activity per distributor and responsible user"""
+        if not self:
+            return
+        activity_type = self.env.ref('mail.mail_activity_data_todo', raise_if_not_found=False)
+        grouped = defaultdict(lambda: self.browse())
+        for alert in self:
+            user = alert.threshold_id.user_id or alert.distributor_id.user_id or self.env.user
+            grouped[(alert.distributor_id, user)] |= alert
+
+        partner_model_id = self.env['ir.model']._get_id('res.partner')
+        activity_vals_list = []
+        for (distributor, user), alerts in grouped.items():
+            lines = ''.join(
+                '<li>%s: %s (minimum %s)</li>' % (html_escape(alert.product_id.display_name), alert.quantity, alert.min_qty)
+                for alert in alerts
+            )
+            activity_vals_list.append({
+                'res_model_id': partner_model_id,
+                'res_id': distributor.id,
+                'activity_type_id': activity_type.id if activity_type else False,
+                'summary': 'Low stock: %s product(s)' % len(alerts),
+                'note': '<ul>%s</ul>' % lines,
+                'user_id': user.id,
+            })
+        self.env['mail.activity'].create(activity_vals_list)
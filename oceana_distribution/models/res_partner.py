@@ -1,4 +1,4 @@
-from odoo import models, fields
+from odoo import models, fields, api
 
 class ResPartner(models.Model):
     _inherit = 'res.partner'
@@ -14,14 +14,67 @@ class ResPartner(models.Model):
         string='Purchase Orders'
     )
     
+    distributor_stock_level_ids = fields.One2many(
+        'distributor.stock.level',
+        'distributor_id',
+        string='Stock Levels'
+    )
+    
     distributor_purchase_count = fields.Integer(
         string='Purchase Orders Count',
-        compute='_compute_distributor_purchase_count'
+        compute='_compute_distributor_purchase_stats',
+        store=True
+    )
+    
+    distributor_purchase_total = fields.Float(
+        string='Purchase Orders Total',
+        compute='_compute_distributor_purchase_stats',
+        store=True,
+        help='Total amount of the non-cancelled distributor purchase orders'
     )
     
-    def _compute_distributor_purchase_count(self):
+    distributor_last_order_date = fields.Datetime(
+        string='Last Purchase Order',
+        compute='_compute_distributor_purchase_stats',
+        store=True
+    )
+    
+    distributor_open_order_count = fields.Integer(
+        string='Open Purchase Orders',
+        compute='_compute_distributor_purchase_stats',
+        store=True,
+        help='Distributor purchase orders in draft or confirmed state'
+    )
+    
+    @api.depends(
+        'distributor_purchase_order_ids',
+        'distributor_purchase_order_ids.state',
+        'distributor_purchase_order_ids.total_amount',
+        'distributor_purchase_order_ids.order_date',
+    )
+    def _compute_distributor_purchase_stats(self):
+        """Aggregate the statistics of all partners with a single grouped query"""
+        partner_ids = tuple(pid for pid in self._origin.ids if pid)
+        stats = {}
+        if partner_ids:
+            self.env['distributor.purchase.order'].flush_model(['distributor_id', 'state', 'total_amount', 'order_date'])
+            self.env.cr.execute("""
+                SELECT distributor_id,
+                       COUNT(*),
+                       COALESCE(SUM(total_amount) FILTER (WHERE state != 'cancelled'), 0),
+                       MAX(order_date),
+                       COUNT(*) FILTER (WHERE state IN ('draft', 'confirmed'))
+                  FROM distributor_purchase_order
+                 WHERE distributor_id IN %s
+              GROUP BY distributor_id
+            """, [partner_ids])
+            stats = {row[0]: row[1:] for row in self.env.cr.fetchall()}
         for partner in self:
-            partner.distributor_purchase_count = len(partner.distributor_purchase_order_ids)
+            count, total, last_date, open_count = stats.get(partner._origin.id, (0, 0.0, False, 0))
+            partner.distributor_purchase_count = count
+            partner.distributor_purchase_total = total
+            partner.distributor_last_order_date = last_date
+            partner.distributor_open_order_count = open_count
     
     def action_view_distributor_purchases(self):
         """Smart button action to view distributor purchase orders"""
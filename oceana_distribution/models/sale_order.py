@@ -1,4 +1,4 @@
-from odoo import models, fields
+from odoo import models, fields, api
 
 class SaleOrder(models.Model):
     _inherit = 'sale.order'
@@ -9,3 +9,25 @@ class SaleOrder(models.Model):
         domain=[('is_distributor', '=', True)],
         help='The distributor whose inventory is being sold'
     )
+
+
+class SaleOrderLine(models.Model):
+    _inherit = 'sale.order.line'
+
+    distributor_available_qty = fields.Float(
+        string='Distributor Stock',
+        compute='_compute_distributor_available_qty',
+        digits='Product Unit of Measure',
+        help='Quantity on hand at the distributor of the order, from the distributor stock snapshot'
+    )
+
+    @api.depends('order_id.distributor_id', 'product_id')
+    def _compute_distributor_available_qty(self):
+        lines = self.filtered(lambda l: l.order_id.distributor_id and l.product_id)
+        levels = self.env['distributor.stock.level'].get_stock_levels(
+            lines.order_id.distributor_id.ids, lines.product_id.ids
+        ) if lines else {}
+        for line in self:
+            line.distributor_available_qty = levels.get(
+                line.order_id.distributor_id.id, {}
+            ).get(line.product_id.id, 0.0)
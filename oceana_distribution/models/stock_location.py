@@ -0,0 +1,14 @@
+from odoo import models, fields
+
+
+class StockLocation(models.Model):
+    _inherit = 'stock.location'
+
+    distributor_id = fields.Many2one(
+        'res.partner',
+        string='Distributor',
+        index=True,
+        copy=False,
+        domain=[('is_distributor', '=', True)],
+        help='Distributor whose stock is kept in this location'
+    )
@@ -0,0 +1,10 @@
+from odoo import models
+
+
+class StockMove(models.Model):
+    _inherit = 'stock.move'
+
+    def _action_done(self, cancel_backorder=False):
+        moves = super(StockMove, self)._action_done(cancel_backorder=cancel_backorder)
+        self.env['distributor.stock.level'].sudo()._apply_done_moves(moves)
+        return moves
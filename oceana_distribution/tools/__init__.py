@@ -0,0 +1 @@
+from .pipeline_probe import PipelineProbe
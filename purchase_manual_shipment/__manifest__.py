@@ -1,6 +1,6 @@
 {
     'name': 'Purchase Manual Shipment Adjustment',
-    'version': '16.0.1.0.0',
+    'version': '16.0.1.1.0',
     'category': 'Inventory/Purchase',
     'summary': 'Track manual shipped quantities for distributor purchase orders',
     'description': """
@@ -14,7 +14,7 @@
     """,
     'author': 'Your Company',
     'website': 'https://www.yourcompany.com',
-    'depends': ['oceana_distribution'],
+    'depends': ['oceana_distribution', 'shipment_variance'],
     'data': [
         'security/ir.model.access.csv',
     ],
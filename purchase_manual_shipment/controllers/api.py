@@ -0,0 +1,57 @@
+from odoo import http
+from odoo.http import request
+
+
+class DistributorManualShipmentAPI(http.Controller):
+
+    @http.route('/api/distributor_manual_shipment/variance_summary', type='json', auth='user', methods=['POST'],
+                csrf=False)
+    def variance_summary(self, group_by='product', filters=None, period=None, **kwargs):
+        """Aggregated shipment variance of distributor purchase order lines"""
+        try:
+            result = request.env['distributor.purchase.order.line'].get_variance_summary(
+                group_by=group_by, filters=filters, period=period
+            )
+            return {
+                'success': True,
+                'summary': result,
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    @http.route('/api/distributor_manual_shipment/reconcile', type='json', auth='user', methods=['POST'], csrf=False)
+    def reconcile(self, rows=None, **kwargs):
+        """Apply actual shipped quantities to distributor order lines from a JSON payload"""
+        try:
+            report = request.env['distributor.purchase.order.line'].reconcile_manual_shipments(rows or [])
+            return {
+                'success': True,
+                'report': report,
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    @http.route('/api/distributor_manual_shipment/reconcile/csv', type='http', auth='user', methods=['POST'],
+                csrf=False)
+    def reconcile_csv(self, file=None, **kwargs):
+        """Apply actual shipped quantities to distributor order lines from an uploaded CSV file (or the raw request body)"""
+        try:
+            content = file.read() if file else request.httprequest.get_data()
+            if isinstance(content, bytes):
+                content = content.decode('utf-8-sig')
+            report = request.env['distributor.purchase.order.line'].reconcile_manual_shipments_csv(content)
+            return request.make_json_response({
+                'success': True,
+                'report': report,
+            })
+        except Exception as e:
+            return request.make_json_response({
+                'success': False,
+                'error': str(e)
+            }, status=400)
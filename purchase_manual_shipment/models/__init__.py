@@ -1 +1,3 @@
 from . import distributor_purchase_order_line
+from . import distributor_purchase_order
+from . import distributor_shipment_variance_rollup
@@ -0,0 +1,8 @@
+from odoo import models
+
+
+class DistributorPurchaseOrder(models.Model):
+    _name = 'distributor.purchase.order'
+    _inherit = ['distributor.purchase.order', 'shipment.variance.order.mixin']
+    _shipment_line_model = 'distributor.purchase.order.line'
+    _shipment_rollup_order_fields = frozenset({'order_date', 'create_date', 'distributor_id'})
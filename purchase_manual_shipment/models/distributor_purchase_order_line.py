@@ -1,132 +1,168 @@
-from odoo import models, fields, api
-from odoo.exceptions import ValidationError
+from odoo import models, api
 
+# group_by: (grouped column, join from the grouped rows to their name, name column)
+SUMMARY_GROUPS = {
+    'product': (
+        '"distributor_purchase_order_line".product_id',
+        'LEFT JOIN product_product pp ON pp.id = groups.group_id '
+        'LEFT JOIN product_template pt ON pt.id = pp.product_tmpl_id',
+        "COALESCE(pt.name->>%s, pt.name->>'en_US')",
+    ),
+    'distributor': ('line_order.distributor_id', 'LEFT JOIN res_partner rp ON rp.id = groups.group_id', 'rp.name'),
+    'order': (
+        '"distributor_purchase_order_line".order_id',
+        'LEFT JOIN distributor_purchase_order o ON o.id = groups.group_id',
+        'o.name',
+    ),
+    'milestone': ('line_order.x_delivery_milestone', '', 'NULL'),
+}
 
-class DistributorPurchaseOrderLine(models.Model):
-    _inherit = 'distributor.purchase.order.line'
-
-    manual_shipped_qty = fields.Float(
-        string='Manual Shipped Qty',
-        digits='Product Unit of Measure',
-        help='Actual quantity shipped (use when it differs from ordered quantity)',
-        copy=False,
-        index=True,
-    )
-
-    qty_diff_manual = fields.Float(
-        string='Shipment Variance',
-        compute='_compute_qty_diff_manual',
-        store=True,
-        digits='Product Unit of Measure',
-        help='Difference between ordered and manually shipped quantity',
-        index=True,
-    )
-
-    adjustment_note = fields.Char(
-        string='Adjustment Reason',
-        help='Reason for shipment quantity difference',
-        copy=False,
-    )
-
-    manual_adjusted = fields.Boolean(
-        string='Manually Adjusted',
-        compute='_compute_manual_adjusted',
-        store=True,
-        help='Line has manual shipment adjustment',
-        index=True,
-    )
-
-    adjustment_date = fields.Datetime(
-        string='Adjustment Date',
-        help='When manual quantity was last modified',
-        copy=False,
-        readonly=True,
-    )
 
-    adjustment_user_id = fields.Many2one(
-        'res.users',
-        string='Adjusted By',
-        help='User who made the manual adjustment',
-        copy=False,
-        readonly=True,
-    )
-
-    line_shipment_status = fields.Selection([
-        ('pending', 'Pending'),
-        ('partial', 'Partially Shipped'),
-        ('shipped', 'Fully Shipped'),
-    ], string='Line Status', compute='_compute_line_shipment_status', store=True)
+class DistributorPurchaseOrderLine(models.Model):
+    _name = 'distributor.purchase.order.line'
+    _inherit = ['distributor.purchase.order.line', 'shipment.variance.report.mixin']
+    _shipment_order_date_field = 'order_date'
+    _shipment_summary_groups = SUMMARY_GROUPS
+    _shipment_summary_columns = """,
+                       COUNT(*) FILTER (WHERE COALESCE("distributor_purchase_order_line".line_shipment_status,
+                                                       'pending') = 'pending') AS pending_count,
+                       COUNT(*) FILTER (WHERE "distributor_purchase_order_line".line_shipment_status = 'partial')
+                           AS partial_count,
+                       COUNT(*) FILTER (WHERE "distributor_purchase_order_line".line_shipment_status = 'shipped')
+                           AS shipped_count"""
+    _shipment_rollup_model = 'distributor.shipment.variance.rollup'
+    _shipment_rollup_fields = frozenset({
+        'order_id', 'product_id', 'quantity', 'manual_shipped_qty', 'qty_diff_manual', 'manual_adjusted',
+        'line_shipment_status',
+    })
 
-    @api.depends('quantity', 'manual_shipped_qty')
-    def _compute_qty_diff_manual(self):
-        for line in self:
-            if line.manual_shipped_qty and line.manual_shipped_qty > 0:
-                line.qty_diff_manual = line.quantity - line.manual_shipped_qty
-            else:
-                line.qty_diff_manual = 0.0
+    def init(self):
+        super(DistributorPurchaseOrderLine, self).init()
+        # keyset pagination of the variance report on (order_id desc, id desc)
+        for name, columns in (
+            ('distributor_po_line_variance_keyset_idx', 'order_id DESC, id DESC'),
+            ('distributor_po_line_variance_product_keyset_idx', 'product_id, order_id DESC, id DESC'),
+        ):
+            self.env.cr.execute("""
+                CREATE INDEX IF NOT EXISTS {name}
+                    ON distributor_purchase_order_line ({columns})
+                 WHERE manual_shipped_qty > 0
+            """.format(name=name, columns=columns))
 
-    @api.depends('manual_shipped_qty', 'quantity')
-    def _compute_manual_adjusted(self):
-        for line in self:
-            line.manual_adjusted = (
-                bool(line.manual_shipped_qty) and
-                line.manual_shipped_qty != line.quantity
-            )
+    def get_manual_shipment_data_batch(self):
+        """
+        Batch version of get_manual_shipment_data for a whole recordset.
+        Lines, orders, distributors, products and users are read in a single
+        query; returns the list of dicts in the order of the recordset.
+        """
+        if not self:
+            return []
+        self.check_access_rights('read')
+        self.check_access_rule('read')
+        self.flush_recordset()
+        for model in ('distributor.purchase.order', 'res.partner', 'res.users', 'product.product', 'product.template'):
+            self.env[model].flush_model()
+        lang = self.env.lang or 'en_US'
+        self.env.cr.execute("""
+            SELECT l.id,
+                   o.id AS order_id,
+                   o.name AS order_name,
+                   o.order_date,
+                   distributor.id AS distributor_id,
+                   distributor.name AS distributor_name,
+                   pp.id AS product_id,
+                   COALESCE(pt.name->>%(lang)s, pt.name->>'en_US') AS product_name,
+                   pp.default_code AS product_code,
+                   l.quantity,
+                   l.manual_shipped_qty,
+                   l.qty_diff_manual,
+                   l.adjustment_note,
+                   l.manual_adjusted,
+                   l.line_shipment_status,
+                   l.adjustment_date,
+                   u.id AS adjusted_by_id,
+                   user_partner.name AS adjusted_by,
+                   l.unit_price,
+                   l.subtotal
+              FROM distributor_purchase_order_line l
+              LEFT JOIN distributor_purchase_order o ON o.id = l.order_id
+              LEFT JOIN res_partner distributor ON distributor.id = o.distributor_id
+              LEFT JOIN product_product pp ON pp.id = l.product_id
+              LEFT JOIN product_template pt ON pt.id = pp.product_tmpl_id
+              LEFT JOIN res_users u ON u.id = l.adjustment_user_id
+              LEFT JOIN res_partner user_partner ON user_partner.id = u.partner_id
+             WHERE l.id = ANY(%(ids)s)
+        """, {'lang': lang, 'ids': self.ids})
+        rows = {row['id']: row for row in self.env.cr.dictfetchall()}
+        result = []
+        for line_id in self.ids:
+            row = rows[line_id]
+            result.append({
+                'id': line_id,
+                'order_id': row['order_id'],
+                'order_name': row['order_name'],
+                'order_date': row['order_date'].isoformat() if row['order_date'] else None,
+                'distributor_id': row['distributor_id'],
+                'distributor_name': row['distributor_name'],
+                'product_id': row['product_id'],
+                'product_name': row['product_name'],
+                'product_code': row['product_code'] or False if row['product_id'] else None,
+                'ordered_qty': float(row['quantity'] or 0.0),
+                'manual_shipped_qty': float(row['manual_shipped_qty'] or 0.0),
+                'variance': float(row['qty_diff_manual'] or 0.0),
+                'adjustment_note': row['adjustment_note'] or '',
+                'manually_adjusted': bool(row['manual_adjusted']),
+                'line_shipment_status': row['line_shipment_status'] or 'pending',
+                'adjustment_date': row['adjustment_date'].isoformat() if row['adjustment_date'] else None,
+                'adjusted_by': row['adjusted_by'],
+                'adjusted_by_id': row['adjusted_by_id'],
+                'unit_price': float(row['unit_price'] or 0.0),
+                'subtotal': float(row['subtotal'] or 0.0),
+            })
+        return result
 
-    @api.depends('quantity', 'manual_shipped_qty')
-    def _compute_line_shipment_status(self):
-        for line in self:
-            if not line.manual_shipped_qty or line.manual_shipped_qty == 0:
-                line.line_shipment_status = 'pending'
-            elif line.manual_shipped_qty >= line.quantity:
-                line.line_shipment_status = 'shipped'
-            else:
-                line.line_shipment_status = 'partial'
+    @api.model
+    def _variance_domain(self, filters=None):
+        """
+        Domain of the variance report lines.
+        filters: dict with keys: date_from (str), date_to (str), distributor_ids (list, also accepted
+                               as customer_ids), product_ids (list), has_variance (bool),
+                               manual_adjusted_only (bool)
+        """
+        domain = [('manual_shipped_qty', '>', 0)]
 
-    def write(self, vals):
-        """Track when manual_shipped_qty is modified"""
-        if 'manual_shipped_qty' in vals:
-            vals = dict(vals)
-            vals['adjustment_date'] = fields.Datetime.now()
-            vals['adjustment_user_id'] = self.env.user.id
-        return super(DistributorPurchaseOrderLine, self).write(vals)
+        if filters:
+            if filters.get('date_from'):
+                domain.append(('order_id.order_date', '>=', filters['date_from']))
+            if filters.get('date_to'):
+                domain.append(('order_id.order_date', '<=', filters['date_to']))
+            distributor_ids = filters.get('distributor_ids') or filters.get('customer_ids')
+            if distributor_ids:
+                domain.append(('order_id.distributor_id', 'in', distributor_ids))
+            if filters.get('product_ids'):
+                domain.append(('product_id', 'in', filters['product_ids']))
+            if filters.get('has_variance'):
+                domain.append(('qty_diff_manual', '!=', 0))
+            if filters.get('manual_adjusted_only'):
+                domain.append(('manual_adjusted', '=', True))
 
-    @api.constrains('manual_shipped_qty')
-    def _check_manual_shipped_qty(self):
-        for line in self:
-            if line.manual_shipped_qty < 0:
-                raise ValidationError(
-                    "Manual shipped quantity cannot be negative for product '{}'.".format(
-                        line.product_id.name or ''
-                    )
-                )
+        return domain
 
-    def get_manual_shipment_data(self):
+    @api.model
+    def get_variance_summary(self, group_by='product', filters=None, period=None, percentiles=False):
         """
-        Helper method for API: Returns JSON-friendly dict with all relevant data.
+        Get aggregated variance data for reporting, see shipment.variance.report.mixin.
+        group_by: 'product' | 'distributor' | 'order' | 'milestone' (delivery milestone of the order)
+        Returns: list of dicts with the ordered/shipped/variance totals, the
+                 adjusted line count and the line status distribution
+                 (pending_count, partial_count, shipped_count)
         """
-        self.ensure_one()
-        order = self.order_id
-        distributor = order.distributor_id if order else None
-        return {
-            'id': self.id,
-            'order_id': order.id if order else None,
-            'order_name': order.name if order else None,
-            'order_date': order.order_date.isoformat() if order and order.order_date else None,
-            'distributor_id': distributor.id if distributor else None,
-            'distributor_name': distributor.name if distributor else None,
-            'product_id': self.product_id.id if self.product_id else None,
-            'product_name': self.product_id.name if self.product_id else None,
-            'product_code': self.product_id.default_code if self.product_id else None,
-            'ordered_qty': float(self.quantity or 0.0),
-            'manual_shipped_qty': float(self.manual_shipped_qty or 0.0),
-            'variance': float(self.qty_diff_manual or 0.0),
-            'adjustment_note': self.adjustment_note or '',
-            'manually_adjusted': bool(self.manual_adjusted),
-            'line_shipment_status': self.line_shipment_status or 'pending',
-            'adjustment_date': self.adjustment_date.isoformat() if self.adjustment_date else None,
-            'adjusted_by': self.adjustment_user_id.name if self.adjustment_user_id else None,
-            'adjusted_by_id': self.adjustment_user_id.id if self.adjustment_user_id else None,
-            'unit_price': float(self.unit_price or 0.0),
-            'subtotal': float(self.subtotal or 0.0),
-        }
+        results = super(DistributorPurchaseOrderLine, self).get_variance_summary(
+            group_by=group_by, filters=filters, period=period, percentiles=percentiles
+        )
+        if group_by == 'milestone':
+            milestone_field = self.env['distributor.purchase.order']._fields['x_delivery_milestone']
+            milestone_labels = dict(milestone_field._description_selection(self.env))
+            for row in results:
+                row['group_name'] = milestone_labels.get(row['group_key'], row['group_key'])
+        return results
@@ -0,0 +1,43 @@
+from odoo import models, fields, api
+
+
+class DistributorShipmentVarianceRollup(models.Model):
+    _name = 'distributor.shipment.variance.rollup'
+    _inherit = 'shipment.variance.rollup.mixin'
+    _description = 'Distributor Shipment Variance Rollup'
+    _rollup_line_model = 'distributor.purchase.order.line'
+    _rollup_day = 'COALESCE(o.order_date, o.create_date)::date'
+    _rollup_keys = (
+        ('product_id', 'l.product_id'),
+        ('distributor_id', 'o.distributor_id'),
+    )
+    _rollup_measures = (
+        ('line_count', 'COUNT(*)'),
+        ('total_ordered', 'COALESCE(SUM(l.quantity), 0)'),
+        ('total_manual_shipped', 'COALESCE(SUM(l.manual_shipped_qty), 0)'),
+        ('total_variance', 'COALESCE(SUM(l.qty_diff_manual), 0)'),
+        ('adjusted_count', 'COUNT(*) FILTER (WHERE l.manual_adjusted)'),
+        ('pending_count', "COUNT(*) FILTER (WHERE COALESCE(l.line_shipment_status, 'pending') = 'pending')"),
+        ('partial_count', "COUNT(*) FILTER (WHERE l.line_shipment_status = 'partial')"),
+        ('shipped_count', "COUNT(*) FILTER (WHERE l.line_shipment_status = 'shipped')"),
+    )
+    _rollup_groups = {'product': 'product_id', 'distributor': 'distributor_id'}
+    _rollup_filters = {
+        'distributor_ids': 'distributor_id',
+        'customer_ids': 'distributor_id',
+        'product_ids': 'product_id',
+    }
+
+    product_id = fields.Many2one('product.product', string='Product', readonly=True)
+    distributor_id = fields.Many2one('res.partner', string='Distributor', readonly=True)
+    pending_count = fields.Integer(string='Pending Lines', readonly=True)
+    partial_count = fields.Integer(string='Partially Shipped Lines', readonly=True)
+    shipped_count = fields.Integer(string='Shipped Lines', readonly=True)
+
+    @api.model
+    def _get_summary(self, group_by, filters=None, period=None):
+        # like the lines, take customer_ids as the distributor filter unless distributor_ids is given
+        filters = dict(filters or {})
+        customer_ids = filters.pop('customer_ids', None)
+        filters['distributor_ids'] = filters.get('distributor_ids') or customer_ids
+        return super(DistributorShipmentVarianceRollup, self)._get_summary(group_by, filters, period)
@@ -1,6 +1,6 @@
 {
     'name': 'Sales Manual Shipment Adjustment',
-    'version': '16.0.1.0.0',
+    'version': '16.0.1.2.0',
     'category': 'Sales',
     'summary': 'Track manual shipped quantities - API optimized',
     'description': """
@@ -9,7 +9,7 @@
     """,
     'author': 'Your Company',
     'website': 'https://www.yourcompany.com',
-    'depends': ['sale_management', 'stock', 'base'],
+    'depends': ['sale_management', 'stock', 'sale_stock', 'base', 'shipment_variance'],
     'data': [
         'security/ir.model.access.csv',
     ],
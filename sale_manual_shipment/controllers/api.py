@@ -0,0 +1,120 @@
+import csv
+import io
+import json
+
+from odoo import http, api
+from odoo.http import request, Response
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class ManualShipmentAPI(http.Controller):
+
+    @http.route('/api/manual_shipment/variance/export/<string:fmt>', type='http', auth='user', methods=['GET'])
+    def export_variance(self, fmt='csv', page_size=1000, **kwargs):
+        """
+        Stream the variance report as CSV or NDJSON.
+
+        Query parameters: date_from, date_to, customer_ids and product_ids
+        (comma separated ids), has_variance, manual_adjusted_only (1/true),
+        page_size (lines read per page).
+        """
+        if fmt not in EXPORT_FORMATS:
+            return request.make_json_response({
+                'success': False,
+                'error': "Unsupported format '%s', expected one of: %s" % (fmt, ', '.join(EXPORT_FORMATS))
+            }, status=400)
+        try:
+            filters = self._parse_variance_filters(kwargs)
+            page_size = max(int(page_size), 1)
+            # check access before streaming, errors cannot be reported once the body started
+            request.env['sale.order.line'].check_access_rights('read')
+        except Exception as e:
+            return request.make_json_response({
+                'success': False,
+                'error': str(e)
+            }, status=400)
+
+        rows = self._stream_variance_rows(filters, page_size, fmt)
+        return Response(rows, headers=[
+            ('Content-Type', EXPORT_FORMATS[fmt]),
+            ('Content-Disposition', 'attachment; filename="shipment_variance.%s"' % fmt),
+        ], direct_passthrough=True)
+
+    def _parse_variance_filters(self, params):
+        """Convert query string parameters to get_variance_report_data filters"""
+        filters = {}
+        for key in ('date_from', 'date_to'):
+            if params.get(key):
+                filters[key] = params[key]
+        for key in ('customer_ids', 'product_ids'):
+            if params.get(key):
+                filters[key] = [int(value) for value in params[key].split(',') if value.strip()]
+        for key in ('has_variance', 'manual_adjusted_only'):
+            if params.get(key):
+                filters[key] = params[key].lower() in ('1', 'true', 'yes')
+        return filters
+
+    def _stream_variance_rows(self, filters, page_size, fmt):
+        """Generator encoding the report page by page.
+
+        The response body is consumed after the request cursor is closed, so
+        the generator reads through its own cursor.
+        """
+        registry = request.env.registry
+        uid = request.env.uid
+        context = dict(request.env.context)
+
+        def generate():
+            with registry.cursor() as cr:
+                env = api.Environment(cr, uid, context)
+                header = None
+                for rows in env['sale.order.line']._iter_variance_pages(filters, page_size=page_size):
+                    if fmt == 'ndjson':
+                        yield ''.join(json.dumps(row) + '\n' for row in rows).encode('utf-8')
+                        continue
+                    buffer = io.StringIO()
+                    writer = csv.DictWriter(buffer, fieldnames=header or list(rows[0]))
+                    if header is None:
+                        header = writer.fieldnames
+                        writer.writeheader()
+                    writer.writerows(rows)
+                    yield buffer.getvalue().encode('utf-8')
+
+        return generate()
+
+    @http.route('/api/manual_shipment/reconcile', type='json', auth='user', methods=['POST'], csrf=False)
+    def reconcile(self, rows=None, **kwargs):
+        """Apply actual shipped quantities to sale order lines from a JSON payload"""
+        try:
+            report = request.env['sale.order.line'].reconcile_manual_shipments(rows or [])
+            return {
+                'success': True,
+                'report': report,
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    @http.route('/api/manual_shipment/reconcile/csv', type='http', auth='user', methods=['POST'], csrf=False)
+    def reconcile_csv(self, file=None, **kwargs):
+        """Apply actual shipped quantities to sale order lines from an uploaded CSV file (or the raw request body)"""
+        try:
+            content = file.read() if file else request.httprequest.get_data()
+            if isinstance(content, bytes):
+                content = content.decode('utf-8-sig')
+            report = request.env['sale.order.line'].reconcile_manual_shipments_csv(content)
+            return request.make_json_response({
+                'success': True,
+                'report': report,
+            })
+        except Exception as e:
+            return request.make_json_response({
+                'success': False,
+                'error': str(e)
+            }, status=400)
@@ -0,0 +1,9 @@
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """Build the shipment variance rollup from the existing sale order lines."""
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['sale.shipment.variance.rollup'].rebuild_rollup()
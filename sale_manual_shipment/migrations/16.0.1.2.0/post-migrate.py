@@ -0,0 +1,9 @@
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """Rebuild the shipment variance rollup, which missed the recomputed ordered and delivered quantities."""
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['sale.shipment.variance.rollup'].rebuild_rollup()
@@ -0,0 +1,9 @@
+from odoo import models
+
+
+class SaleOrder(models.Model):
+    _name = 'sale.order'
+    _inherit = ['sale.order', 'shipment.variance.order.mixin']
+    _shipment_line_model = 'sale.order.line'
+    # the customer and the company reach the lines through their own stored related fields
+    _shipment_rollup_order_fields = frozenset({'date_order'})
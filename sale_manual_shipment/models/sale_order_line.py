@@ -1,126 +1,140 @@
-from odoo import models, fields, api
-from odoo.exceptions import ValidationError
+from odoo import models, api
+
+# group_by: (grouped column, join from the grouped rows to their name, name column)
+SUMMARY_GROUPS = {
+    'product': (
+        '"sale_order_line".product_id',
+        'LEFT JOIN product_product pp ON pp.id = groups.group_id '
+        'LEFT JOIN product_template pt ON pt.id = pp.product_tmpl_id',
+        "COALESCE(pt.name->>%s, pt.name->>'en_US')",
+    ),
+    'customer': (
+        '"sale_order_line".order_partner_id',
+        'LEFT JOIN res_partner rp ON rp.id = groups.group_id',
+        'rp.name',
+    ),
+    'order': ('"sale_order_line".order_id', 'LEFT JOIN sale_order so ON so.id = groups.group_id', 'so.name'),
+}
 
 
 class SaleOrderLine(models.Model):
-    _inherit = 'sale.order.line'
-
-    manual_shipped_qty = fields.Float(
-        string='Manual Shipped Qty',
-        digits='Product Unit of Measure',
-        help='Actual quantity shipped (use when it differs from delivery order)',
-        copy=False,
-        index=True,
-    )
-
-    qty_diff_manual = fields.Float(
-        string='Shipment Variance',
-        compute='_compute_qty_diff_manual',
-        store=True,
-        digits='Product Unit of Measure',
-        help='Difference between ordered and manually shipped quantity',
-        index=True,
-    )
-
-    adjustment_note = fields.Char(
-        string='Adjustment Reason',
-        help='Reason for shipment quantity difference',
-        copy=False,
-    )
-
-    manual_adjusted = fields.Boolean(
-        string='Manually Adjusted',
-        compute='_compute_manual_adjusted',
-        store=True,
-        help='Line has manual shipment adjustment',
-        index=True,
-    )
-
-    adjustment_date = fields.Datetime(
-        string='Adjustment Date',
-        help='When manual quantity was last modified',
-        copy=False,
-        readonly=True,
-    )
-
-    adjustment_user_id = fields.Many2one(
-        'res.users',
-        string='Adjusted By',
-        help='User who made the manual adjustment',
-        copy=False,
-        readonly=True,
-    )
-
-    @api.depends('product_uom_qty', 'manual_shipped_qty')
-    def _compute_qty_diff_manual(self):
-        for line in self:
-            if line.manual_shipped_qty and line.manual_shipped_qty > 0:
-                line.qty_diff_manual = line.product_uom_qty - line.manual_shipped_qty
-            else:
-                line.qty_diff_manual = 0.0
-
-    @api.depends('manual_shipped_qty', 'product_uom_qty')
-    def _compute_manual_adjusted(self):
-        for line in self:
-            line.manual_adjusted = (
-                bool(line.manual_shipped_qty) and
-                line.manual_shipped_qty != line.product_uom_qty
-            )
-
-    def write(self, vals):
-        """Track when manual_shipped_qty is modified"""
-        if 'manual_shipped_qty' in vals:
-            vals = dict(vals)  # copy to avoid mutating incoming dict
-            vals['adjustment_date'] = fields.Datetime.now()
-            vals['adjustment_user_id'] = self.env.user.id
-        return super(SaleOrderLine, self).write(vals)
-
-    @api.constrains('manual_shipped_qty')
-    def _check_manual_shipped_qty(self):
-        for line in self:
-            if line.manual_shipped_qty < 0:
-                raise ValidationError(
-                    "Manual shipped quantity cannot be negative for product '{}'.".format(
-                        line.product_id.name or ''
-                    )
-                )
-
-    def get_manual_shipment_data(self):
+    _name = 'sale.order.line'
+    _inherit = ['sale.order.line', 'shipment.variance.mixin', 'shipment.variance.report.mixin']
+    _shipment_ordered_qty_field = 'product_uom_qty'
+    _shipment_order_date_field = 'date_order'
+    _shipment_summary_groups = SUMMARY_GROUPS
+    _shipment_summary_columns = """,
+                       COALESCE(SUM("sale_order_line".qty_delivered), 0)::float8 AS total_delivered"""
+    _shipment_rollup_model = 'sale.shipment.variance.rollup'
+    _shipment_rollup_fields = frozenset({
+        'order_id', 'company_id', 'product_id', 'order_partner_id',
+        'product_uom_qty', 'qty_delivered', 'manual_shipped_qty', 'qty_diff_manual', 'manual_adjusted',
+    })
+
+    def init(self):
+        super(SaleOrderLine, self).init()
+        # covering indexes of the variance summary grouped by product or customer
+        for name, columns in (
+            ('sale_order_line_variance_summary_product_idx', 'product_id'),
+            ('sale_order_line_variance_summary_customer_idx', 'order_partner_id'),
+        ):
+            self.env.cr.execute("""
+                CREATE INDEX IF NOT EXISTS {name}
+                    ON sale_order_line ({columns})
+               INCLUDE (order_id, product_uom_qty, qty_delivered, manual_shipped_qty, qty_diff_manual, manual_adjusted)
+                 WHERE manual_shipped_qty > 0
+            """.format(name=name, columns=columns))
+        # keyset pagination of the variance report on (order_id desc, id desc)
+        for name, columns in (
+            ('sale_order_line_variance_keyset_idx', 'order_id DESC, id DESC'),
+            ('sale_order_line_variance_product_keyset_idx', 'product_id, order_id DESC, id DESC'),
+            ('sale_order_line_variance_customer_keyset_idx', 'order_partner_id, order_id DESC, id DESC'),
+        ):
+            self.env.cr.execute("""
+                CREATE INDEX IF NOT EXISTS {name}
+                    ON sale_order_line ({columns})
+                 WHERE manual_shipped_qty > 0
+            """.format(name=name, columns=columns))
+
+    def get_manual_shipment_data_batch(self):
         """
-        Helper method for API: Returns JSON-friendly dict with all relevant data.
-        Can be called directly from FastAPI endpoint via odoorpc or xmlrpc.
+        Batch version of get_manual_shipment_data for a whole recordset.
+        Lines, orders, customers, products, UoMs and users are read in a single
+        query; returns the list of dicts in the order of the recordset.
         """
-        self.ensure_one()
-        order = self.order_id
-        partner = self.order_partner_id or order.partner_id
-        return {
-            'id': self.id,
-            'order_id': order.id if order else None,
-            'order_name': order.name if order else None,
-            'order_date': order.date_order.isoformat() if order and order.date_order else None,
-            'customer_id': partner.id if partner else None,
-            'customer_name': partner.name if partner else None,
-            'product_id': self.product_id.id if self.product_id else None,
-            'product_name': self.product_id.name if self.product_id else None,
-            'product_code': self.product_id.default_code if self.product_id else None,
-            'ordered_qty': float(self.product_uom_qty or 0.0),
-            'delivered_qty': float(self.qty_delivered or 0.0),
-            'manual_shipped_qty': float(self.manual_shipped_qty or 0.0),
-            'variance': float(self.qty_diff_manual or 0.0),
-            'adjustment_note': self.adjustment_note or '',
-            'manually_adjusted': bool(self.manual_adjusted),
-            'adjustment_date': self.adjustment_date.isoformat() if self.adjustment_date else None,
-            'adjusted_by': self.adjustment_user_id.name if self.adjustment_user_id else None,
-            'adjusted_by_id': self.adjustment_user_id.id if self.adjustment_user_id else None,
-            'uom': self.product_uom.name if self.product_uom else None,
-            'state': self.state,
-            'order_state': order.state if order else None,
-        }
+        if not self:
+            return []
+        self.check_access_rights('read')
+        self.check_access_rule('read')
+        self.flush_recordset()
+        for model in ('sale.order', 'res.partner', 'res.users', 'product.product', 'product.template', 'uom.uom'):
+            self.env[model].flush_model()
+        lang = self.env.lang or 'en_US'
+        self.env.cr.execute("""
+            SELECT l.id,
+                   o.id AS order_id,
+                   o.name AS order_name,
+                   o.date_order,
+                   customer.id AS customer_id,
+                   customer.name AS customer_name,
+                   pp.id AS product_id,
+                   COALESCE(pt.name->>%(lang)s, pt.name->>'en_US') AS product_name,
+                   pp.default_code AS product_code,
+                   l.product_uom_qty,
+                   l.qty_delivered,
+                   l.manual_shipped_qty,
+                   l.qty_diff_manual,
+                   l.adjustment_note,
+                   l.manual_adjusted,
+                   l.adjustment_date,
+                   u.id AS adjusted_by_id,
+                   user_partner.name AS adjusted_by,
+                   COALESCE(uom.name->>%(lang)s, uom.name->>'en_US') AS uom,
+                   l.state,
+                   o.state AS order_state
+              FROM sale_order_line l
+              LEFT JOIN sale_order o ON o.id = l.order_id
+              LEFT JOIN res_partner customer ON customer.id = COALESCE(l.order_partner_id, o.partner_id)
+              LEFT JOIN product_product pp ON pp.id = l.product_id
+              LEFT JOIN product_template pt ON pt.id = pp.product_tmpl_id
+              LEFT JOIN res_users u ON u.id = l.adjustment_user_id
+              LEFT JOIN res_partner user_partner ON user_partner.id = u.partner_id
+              LEFT JOIN uom_uom uom ON uom.id = l.product_uom
+             WHERE l.id = ANY(%(ids)s)
+        """, {'lang': lang, 'ids': self.ids})
+        rows = {row['id']: row for row in self.env.cr.dictfetchall()}
+        result = []
+        for line_id in self.ids:
+            row = rows[line_id]
+            result.append({
+                'id': line_id,
+                'order_id': row['order_id'],
+                'order_name': row['order_name'],
+                'order_date': row['date_order'].isoformat() if row['date_order'] else None,
+                'customer_id': row['customer_id'],
+                'customer_name': row['customer_name'],
+                'product_id': row['product_id'],
+                'product_name': row['product_name'],
+                'product_code': row['product_code'] or False if row['product_id'] else None,
+                'ordered_qty': float(row['product_uom_qty'] or 0.0),
+                'delivered_qty': float(row['qty_delivered'] or 0.0),
+                'manual_shipped_qty': float(row['manual_shipped_qty'] or 0.0),
+                'variance': float(row['qty_diff_manual'] or 0.0),
+                'adjustment_note': row['adjustment_note'] or '',
+                'manually_adjusted': bool(row['manual_adjusted']),
+                'adjustment_date': row['adjustment_date'].isoformat() if row['adjustment_date'] else None,
+                'adjusted_by': row['adjusted_by'],
+                'adjusted_by_id': row['adjusted_by_id'],
+                'uom': row['uom'],
+                'state': row['state'],
+                'order_state': row['order_state'],
+            })
+        return result
 
     @api.model
-    def get_variance_report_data(self, filters=None):
+    def _variance_domain(self, filters=None):
         """
-        Optimized method for FastAPI: Get all variance data with optional filters.
+        Domain of the variance report lines.
         filters: dict with keys: date_from (str), date_to (str), customer_ids (list), product_ids (list),
                                has_variance (bool), manual_adjusted_only (bool)
         """
@@ -140,48 +154,22 @@ class SaleOrderLine(models.Model):
             if filters.get('manual_adjusted_only'):
                 domain.append(('manual_adjusted', '=', True))
 
-        lines = self.search(domain, order='order_id desc, id desc')
-        return [line.get_manual_shipment_data() for line in lines]
+        return domain
 
     @api.model
-    def get_variance_summary(self, group_by='product'):
+    def get_variance_report_data(self, filters=None):
         """
-        Get aggregated variance data for reporting.
-        group_by: 'product' | 'customer' | 'order'
-        Returns: list of dicts
+        Optimized method for FastAPI: Get all variance data with optional filters.
+        filters: see _variance_domain
         """
-        if group_by not in ('product', 'customer', 'order'):
-            group_by = 'product'
+        lines = self.search(self._variance_domain(filters), order='order_id desc, id desc')
+        return lines.get_manual_shipment_data_batch()
+
+    @api.model
+    def _can_use_variance_rollup(self):
+        """Whether the rollup, which is only split by company, shows the same lines as a search.
 
-        query = """
-            SELECT 
-                CASE 
-                    WHEN %s = 'product' THEN CAST(sol.product_id AS TEXT)
-                    WHEN %s = 'customer' THEN CAST(so.partner_id AS TEXT)
-                    ELSE CAST(sol.order_id AS TEXT)
-                END as group_key,
-                CASE 
-                    WHEN %s = 'product' THEN pt.name
-                    WHEN %s = 'customer' THEN rp.name
-                    ELSE so.name
-                END as group_name,
-                COUNT(sol.id) as line_count,
-                COALESCE(SUM(sol.product_uom_qty),0) as total_ordered,
-                COALESCE(SUM(sol.qty_delivered),0) as total_delivered,
-                COALESCE(SUM(sol.manual_shipped_qty),0) as total_manual_shipped,
-                COALESCE(SUM(sol.qty_diff_manual),0) as total_variance,
-                COUNT(CASE WHEN sol.manual_adjusted THEN 1 END) as adjusted_count
-            FROM sale_order_line sol
-            JOIN sale_order so ON sol.order_id = so.id
-            LEFT JOIN product_product pp ON sol.product_id = pp.id
-            LEFT JOIN product_template pt ON pp.product_tmpl_id = pt.id
-            LEFT JOIN res_partner rp ON so.partner_id = rp.id
-            WHERE sol.manual_shipped_qty > 0
-            GROUP BY group_key, group_name
-            ORDER BY total_variance DESC
+        Salesmen restricted to their own documents go through the lines so
+        the personal record rule still applies.
         """
-        # pass the same parameter multiple times for the CASE checks
-        params = (group_by, group_by, group_by, group_by)
-        self.env.cr.execute(query, params)
-        results = self.env.cr.dictfetchall()
-        return results
+        return self.env.su or self.env.user.has_group('sales_team.group_sale_salesman_all_leads')
@@ -0,0 +1,30 @@
+from odoo import models, fields
+
+
+class SaleShipmentVarianceRollup(models.Model):
+    _name = 'sale.shipment.variance.rollup'
+    _inherit = 'shipment.variance.rollup.mixin'
+    _description = 'Sale Shipment Variance Rollup'
+    _rollup_line_model = 'sale.order.line'
+    _rollup_day = 'o.date_order::date'
+    _rollup_keys = (
+        ('company_id', 'l.company_id'),
+        ('product_id', 'l.product_id'),
+        ('customer_id', 'l.order_partner_id'),
+    )
+    _rollup_measures = (
+        ('line_count', 'COUNT(*)'),
+        ('total_ordered', 'COALESCE(SUM(l.product_uom_qty), 0)'),
+        ('total_delivered', 'COALESCE(SUM(l.qty_delivered), 0)'),
+        ('total_manual_shipped', 'COALESCE(SUM(l.manual_shipped_qty), 0)'),
+        ('total_variance', 'COALESCE(SUM(l.qty_diff_manual), 0)'),
+        ('adjusted_count', 'COUNT(*) FILTER (WHERE l.manual_adjusted)'),
+    )
+    _rollup_groups = {'product': 'product_id', 'customer': 'customer_id'}
+    _rollup_filters = {'customer_ids': 'customer_id', 'product_ids': 'product_id'}
+    _rollup_company_column = 'company_id'
+
+    company_id = fields.Many2one('res.company', string='Company', readonly=True)
+    product_id = fields.Many2one('product.product', string='Product', readonly=True)
+    customer_id = fields.Many2one('res.partner', string='Customer', readonly=True)
+    total_delivered = fields.Float(string='Delivered', readonly=True)
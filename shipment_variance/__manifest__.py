@@ -0,0 +1,34 @@
+{
+    'name': 'Shipment Variance',
+    'version': '16.0.1.0.0',
+    'category': 'Inventory',
+    'summary': 'Shared manual shipment tracking fields and variance computation',
+    'description': """
+        Abstract mixin holding the manual shipment tracking fields of order lines
+        (manual shipped quantity, variance, adjustment note, date and user).
+
+        Used by sale order lines and distributor purchase order lines so the
+        variance computation, the adjustment stamping and the constraints are
+        identical everywhere.
+
+        Every change of the manual shipped quantity is appended to a compact
+        adjustment log (line, old and new quantity, note, user, date).
+
+        The mixin also reconciles shipped quantities in bulk from JSON rows or
+        CSV. A second mixin provides the shared reporting API of the line
+        models: keyset-paginated variance report pages, streaming and the
+        variance summary (optionally answered by a rollup).
+
+        The daily rollups of the line models share a third mixin; the line and
+        order mixins keep them up to date with every stored change.
+    """,
+    'author': 'Your Company',
+    'website': 'https://www.yourcompany.com',
+    'depends': ['base'],
+    'data': [
+        'security/ir.model.access.csv',
+    ],
+    'installable': True,
+    'application': False,
+    'license': 'LGPL-3',
+}
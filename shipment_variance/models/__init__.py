@@ -0,0 +1,5 @@
+from . import shipment_variance_mixin
+from . import shipment_adjustment_log
+from . import shipment_variance_report_mixin
+from . import shipment_variance_rollup_mixin
+from . import shipment_variance_order_mixin
@@ -0,0 +1,95 @@
+from odoo import models, fields, api
+
+
+class ShipmentAdjustmentLog(models.Model):
+    _name = 'shipment.adjustment.log'
+    _description = 'Manual Shipment Adjustment Log'
+    _order = 'date desc, id desc'
+    _log_access = False
+
+    res_model = fields.Char(string='Model', required=True, readonly=True)
+    res_id = fields.Integer(string='Line', required=True, readonly=True)
+    old_qty = fields.Float(string='Old Qty', digits='Product Unit of Measure', readonly=True)
+    new_qty = fields.Float(string='New Qty', digits='Product Unit of Measure', readonly=True)
+    note = fields.Char(string='Adjustment Reason', readonly=True)
+    user_id = fields.Many2one('res.users', string='Adjusted By', readonly=True)
+    date = fields.Datetime(string='Date', required=True, readonly=True)
+
+    def init(self):
+        # append-only and filled in date order: BRIN on the date stays tiny
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS shipment_adjustment_log_line_date_idx
+                ON shipment_adjustment_log (res_model, res_id, date)
+        """)
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS shipment_adjustment_log_date_brin_idx
+                ON shipment_adjustment_log USING brin (date)
+        """)
+
+    @api.model
+    def _log_adjustments(self, res_model, res_ids, old_qtys, new_qtys, notes):
+        """Append one row per adjusted line with a single INSERT"""
+        if not res_ids:
+            return
+        self.env.cr.execute("""
+            INSERT INTO shipment_adjustment_log (res_model, res_id, old_qty, new_qty, note, user_id, date)
+            SELECT %(res_model)s, line_id, old_qty, new_qty, note, %(uid)s, now() at time zone 'UTC'
+              FROM unnest(%(ids)s::int[], %(old)s::numeric[], %(new)s::numeric[], %(notes)s::varchar[])
+                   AS t(line_id, old_qty, new_qty, note)
+        """, {
+            'res_model': res_model,
+            'uid': self.env.uid,
+            'ids': list(res_ids),
+            'old': list(old_qtys),
+            'new': list(new_qtys),
+            'notes': [note or None for note in notes],
+        })
+
+    @api.model
+    def get_adjustment_history(self, res_model, res_ids=None, date_from=None, date_to=None, limit=None):
+        """
+        Adjustments of the lines of ``res_model``, newest first.
+        res_ids: optional list of line ids
+        Returns: list of dicts {id, res_id, old_qty, new_qty, note, user_id, user_name, date}
+
+        Only the adjustments of lines the user can read are returned.
+        """
+        self.check_access_rights('read')
+        lines = self.env[res_model]
+        lines.check_access_rights('read')
+        conditions, params = ['l.res_model = %(res_model)s'], {'res_model': res_model}
+        if res_ids:
+            res_ids = lines.browse(res_ids)._filter_access_rules('read').ids
+            if not res_ids:
+                return []
+            conditions.append('l.res_id = ANY(%(res_ids)s)')
+            params['res_ids'] = res_ids
+        else:
+            query = lines._where_calc([])
+            lines._apply_ir_rules(query, 'read')
+            if query.where_clause:
+                readable_sql, readable_params = query.select('"%s"."id"' % lines._table)
+                conditions.append('l.res_id IN (%s)' % self.env.cr.mogrify(readable_sql, readable_params).decode())
+        if date_from:
+            conditions.append('l.date >= %(date_from)s')
+            params['date_from'] = fields.Datetime.to_datetime(date_from)
+        if date_to:
+            conditions.append('l.date <= %(date_to)s')
+            params['date_to'] = fields.Datetime.to_datetime(date_to)
+        query = """
+            SELECT l.id, l.res_id, l.old_qty::float8, l.new_qty::float8, l.note,
+                   l.user_id, p.name AS user_name, l.date
+              FROM shipment_adjustment_log l
+              LEFT JOIN res_users u ON u.id = l.user_id
+              LEFT JOIN res_partner p ON p.id = u.partner_id
+             WHERE {conditions}
+          ORDER BY l.date DESC, l.id DESC
+        """.format(conditions=' AND '.join(conditions))
+        if limit:
+            query += ' LIMIT %(limit)s'
+            params['limit'] = int(limit)
+        self.env.cr.execute(query, params)
+        result = self.env.cr.dictfetchall()
+        for row in result:
+            row['date'] = row['date'].isoformat() if row['date'] else None
+        return result
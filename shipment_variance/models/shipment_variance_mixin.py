@@ -0,0 +1,322 @@
+import csv
+import io
+from collections import defaultdict
+
+from odoo import models, fields, api
+from odoo.exceptions import ValidationError
+from odoo.tools import float_compare, float_round
+
+RECONCILE_CSV_COLUMNS = ('order_name', 'product_code', 'manual_shipped_qty', 'note')
+
+
+class ShipmentVarianceMixin(models.AbstractModel):
+    _name = 'shipment.variance.mixin'
+    _description = 'Manual Shipment Variance Mixin'
+
+    # Name of the ordered quantity field of the inheriting line model
+    _shipment_ordered_qty_field = 'quantity'
+    # Rollup model (shipment.variance.rollup.mixin) of the lines, if any, and the line columns it reads
+    _shipment_rollup_model = None
+    _shipment_rollup_fields = frozenset()
+
+    manual_shipped_qty = fields.Float(
+        string='Manual Shipped Qty',
+        digits='Product Unit of Measure',
+        help='Actual quantity shipped (use when it differs from the ordered quantity)',
+        copy=False,
+        index=True,
+    )
+
+    qty_diff_manual = fields.Float(
+        string='Shipment Variance',
+        compute='_compute_shipment_variance',
+        store=True,
+        digits='Product Unit of Measure',
+        help='Difference between ordered and manually shipped quantity',
+        index=True,
+    )
+
+    adjustment_note = fields.Char(
+        string='Adjustment Reason',
+        help='Reason for shipment quantity difference',
+        copy=False,
+    )
+
+    manual_adjusted = fields.Boolean(
+        string='Manually Adjusted',
+        compute='_compute_shipment_variance',
+        store=True,
+        help='Line has manual shipment adjustment',
+        index=True,
+    )
+
+    adjustment_date = fields.Datetime(
+        string='Adjustment Date',
+        help='When manual quantity was last modified',
+        copy=False,
+        readonly=True,
+    )
+
+    adjustment_user_id = fields.Many2one(
+        'res.users',
+        string='Adjusted By',
+        help='User who made the manual adjustment',
+        copy=False,
+        readonly=True,
+    )
+
+    @api.depends(lambda self: ('manual_shipped_qty', self._shipment_ordered_qty_field))
+    def _compute_shipment_variance(self):
+        """Compute qty_diff_manual and manual_adjusted for the whole recordset.
+
+        Both columns are read once for all records, and each distinct result
+        is assigned to all of its records in one batch.
+        """
+        ordered = self.mapped(self._shipment_ordered_qty_field)
+        shipped = self.mapped('manual_shipped_qty')
+        variances = defaultdict(list)
+        adjusted = defaultdict(list)
+        for record_id, ordered_qty, shipped_qty in zip(self._ids, ordered, shipped):
+            variances[ordered_qty - shipped_qty if shipped_qty > 0 else 0.0].append(record_id)
+            adjusted[bool(shipped_qty) and shipped_qty != ordered_qty].append(record_id)
+        for variance, record_ids in variances.items():
+            self.browse(record_ids).qty_diff_manual = variance
+        for is_adjusted, record_ids in adjusted.items():
+            self.browse(record_ids).manual_adjusted = is_adjusted
+
+    @api.model
+    def _create(self, data_list):
+        records = super(ShipmentVarianceMixin, self)._create(data_list)
+        records._update_variance_rollup(1)
+        return records
+
+    def _write(self, vals):
+        """Keep the variance rollup up to date with every stored change, recomputed fields included"""
+        rollup = bool(self._shipment_rollup_model) and not self._shipment_rollup_fields.isdisjoint(vals)
+        if rollup:
+            self._update_variance_rollup(-1)
+        result = super(ShipmentVarianceMixin, self)._write(vals)
+        if rollup:
+            self._update_variance_rollup(1)
+        return result
+
+    def unlink(self):
+        self._update_variance_rollup(-1)
+        return super(ShipmentVarianceMixin, self).unlink()
+
+    def write(self, vals):
+        """Track when manual_shipped_qty is modified and log every change"""
+        if 'manual_shipped_qty' not in vals:
+            return super(ShipmentVarianceMixin, self).write(vals)
+        vals = dict(vals)  # copy to avoid mutating incoming dict
+        vals['adjustment_date'] = fields.Datetime.now()
+        vals['adjustment_user_id'] = self.env.user.id
+        previous = dict(zip(self._ids, self.mapped('manual_shipped_qty')))
+        result = super(ShipmentVarianceMixin, self).write(vals)
+        self._log_shipment_adjustments(previous)
+        return result
+
+    def _log_shipment_adjustments(self, previous):
+        """Append the changed quantities to the adjustment log in one INSERT.
+
+        previous: {record id: manual_shipped_qty before the change}
+        """
+        changed = [
+            (record.id, previous[record.id], record.manual_shipped_qty, record.adjustment_note)
+            for record in self
+            if record.id and record.manual_shipped_qty != previous.get(record.id)
+        ]
+        if changed:
+            ids, old_qtys, new_qtys, notes = zip(*changed)
+            self.env['shipment.adjustment.log'].sudo()._log_adjustments(self._name, ids, old_qtys, new_qtys, notes)
+
+    def get_adjustment_history(self, date_from=None, date_to=None, limit=None):
+        """Adjustment log of the lines of ``self``, newest first"""
+        return self.env['shipment.adjustment.log'].get_adjustment_history(
+            self._name, self.ids, date_from=date_from, date_to=date_to, limit=limit
+        )
+
+    @api.constrains('manual_shipped_qty')
+    def _check_manual_shipped_qty(self):
+        negative = self.filtered(lambda line: line.manual_shipped_qty < 0)
+        if negative:
+            raise ValidationError(
+                "Manual shipped quantity cannot be negative for product '{}'.".format(
+                    negative[0].product_id.name or ''
+                )
+            )
+
+    def _update_variance_rollup(self, sign):
+        """Add (sign=1) or remove (sign=-1) the lines to the variance rollup, if the model keeps one.
+
+        The rollup reads the rows of the lines, not the cache: raw SQL
+        updates of the rollup columns call it right before and right after
+        their statement.
+        """
+        if self and self._shipment_rollup_model:
+            self.env[self._shipment_rollup_model].sudo()._apply_lines(self.ids, sign)
+
+    @api.model
+    def _update_variance_rollup_of_orders(self, order_ids, sign):
+        """_update_variance_rollup of the stored lines of the orders"""
+        if not order_ids or not self._shipment_rollup_model:
+            return
+        self.env.cr.execute('SELECT id FROM "%s" WHERE order_id = ANY(%%s)' % self._table, [list(order_ids)])
+        self.browse([row[0] for row in self.env.cr.fetchall()])._update_variance_rollup(sign)
+
+    # =====================================================
+    # BULK RECONCILIATION
+    # =====================================================
+    @api.model
+    def reconcile_manual_shipments(self, rows):
+        """
+        Apply a file of actual shipped quantities.
+
+        rows: list of dicts with order_name, product_code, manual_shipped_qty,
+              note (optional) and row (optional, echoed in the report instead of the position)
+
+        Lines are matched on order reference and product internal reference
+        with a single search. Quantities are validated up front, lines whose
+        values do not change are left alone, and the others are written
+        together by _bulk_write_manual_shipments. If that write fails, every
+        changed row is reported in error. When several rows target the same
+        line the last one wins.
+
+        Returns: list of dicts {row, order_name, product_code, line_id, status, error}
+                 with status 'updated', 'unchanged', 'skipped' or 'error'
+        """
+        precision = self.env['decimal.precision'].precision_get('Product Unit of Measure')
+        report, parsed = [], []
+        for index, row in enumerate(rows):
+            order_name = (row.get('order_name') or '').strip()
+            product_code = (row.get('product_code') or '').strip()
+            result = {
+                'row': row.get('row', index),
+                'order_name': order_name,
+                'product_code': product_code,
+                'line_id': None,
+                'status': 'error',
+                'error': None,
+            }
+            report.append(result)
+            if not order_name or not product_code:
+                result['error'] = "Missing order reference or product code"
+                continue
+            try:
+                quantity = float_round(float(row.get('manual_shipped_qty')), precision_digits=precision)
+            except (TypeError, ValueError):
+                result['error'] = "Invalid quantity '%s'" % row.get('manual_shipped_qty')
+                continue
+            if quantity < 0:
+                result['error'] = "Manual shipped quantity cannot be negative"
+                continue
+            parsed.append((result, (order_name, product_code), quantity, row.get('note') or None))
+
+        lines = self.search([
+            ('order_id.name', 'in', list({key[0] for result, key, quantity, note in parsed})),
+            ('product_id.default_code', 'in', list({key[1] for result, key, quantity, note in parsed})),
+        ]) if parsed else self.browse()
+        matches = defaultdict(list)
+        for line in lines:
+            matches[(line.order_id.name, line.product_id.default_code)].append(line)
+
+        latest = {}
+        for result, key, quantity, note in parsed:
+            candidates = matches.get(key, [])
+            if not candidates:
+                result['error'] = "No line for product '%s' in order '%s'" % (key[1], key[0])
+                continue
+            if len(candidates) > 1:
+                result['error'] = "Product '%s' is on %s lines of order '%s'" % (key[1], len(candidates), key[0])
+                continue
+            line = candidates[0]
+            result['line_id'] = line.id
+            if line.id in latest:
+                previous = latest[line.id][0]
+                previous.update(status='skipped', error="Superseded by row %s" % result['row'])
+            latest[line.id] = (result, line, quantity, note)
+
+        updates, updated = {}, []
+        for result, line, quantity, note in latest.values():
+            vals = {}
+            if float_compare(line.manual_shipped_qty, quantity, precision_digits=precision):
+                vals['manual_shipped_qty'] = quantity
+            if note is not None and note != (line.adjustment_note or ''):
+                vals['adjustment_note'] = note
+            if vals:
+                updates[line.id] = vals
+                updated.append(result)
+            else:
+                result['status'] = 'unchanged'
+
+        if updates:
+            try:
+                with self.env.cr.savepoint():
+                    self._bulk_write_manual_shipments(updates)
+                    self.env.flush_all()
+            except Exception as e:
+                self.env.invalidate_all()
+                for result in updated:
+                    result['error'] = str(e)
+            else:
+                for result in updated:
+                    result['status'] = 'updated'
+        return report
+
+    @api.model
+    def reconcile_manual_shipments_csv(self, content):
+        """Bulk reconciliation from CSV text with the columns of ``RECONCILE_CSV_COLUMNS``;
+        the report references the CSV line numbers"""
+        reader = csv.DictReader(io.StringIO(content))
+        return self.reconcile_manual_shipments([
+            dict({key: value for key, value in row.items() if key}, row=row_number)
+            for row_number, row in enumerate(reader, start=2)
+        ])
+
+    @api.model
+    def _bulk_write_manual_shipments(self, updates):
+        """
+        Write validated manual shipped quantities and notes with one UPDATE.
+
+        updates: {line id: {'manual_shipped_qty': float (optional), 'adjustment_note': str (optional)}}
+
+        The adjustment stamp and log follow the rules of write(), the stored
+        computes are recomputed by the ORM on the updated lines only.
+        """
+        lines = self.browse(list(updates))
+        lines.check_access_rights('write')
+        lines.check_access_rule('write')
+        lines.flush_recordset()
+        cr = self.env.cr
+        cr.execute(
+            'SELECT id, COALESCE(manual_shipped_qty, 0) FROM "{table}" WHERE id = ANY(%s)'.format(table=self._table),
+            [lines.ids]
+        )
+        previous = {line_id: float(qty) for line_id, qty in cr.fetchall()}
+        lines._update_variance_rollup(-1)
+        cr.execute("""
+            UPDATE "{table}" line
+               SET manual_shipped_qty = CASE WHEN v.has_shipped THEN v.shipped ELSE line.manual_shipped_qty END,
+                   adjustment_note = CASE WHEN v.has_note THEN v.note ELSE line.adjustment_note END,
+                   adjustment_date = CASE WHEN v.has_shipped THEN now() at time zone 'UTC' ELSE line.adjustment_date END,
+                   adjustment_user_id = CASE WHEN v.has_shipped THEN %(uid)s ELSE line.adjustment_user_id END,
+                   write_uid = %(uid)s,
+                   write_date = now() at time zone 'UTC'
+              FROM unnest(%(ids)s::int[], %(has_shipped)s::bool[], %(shipped)s::numeric[],
+                          %(has_note)s::bool[], %(note)s::varchar[]) AS v(id, has_shipped, shipped, has_note, note)
+             WHERE line.id = v.id
+        """.format(table=self._table), {
+            'uid': self.env.uid,
+            'ids': lines.ids,
+            'has_shipped': ['manual_shipped_qty' in updates[line_id] for line_id in lines.ids],
+            'shipped': [updates[line_id].get('manual_shipped_qty') for line_id in lines.ids],
+            'has_note': ['adjustment_note' in updates[line_id] for line_id in lines.ids],
+            'note': [updates[line_id].get('adjustment_note') or None for line_id in lines.ids],
+        })
+        lines._update_variance_rollup(1)
+        fnames = ['manual_shipped_qty', 'adjustment_note', 'adjustment_date', 'adjustment_user_id',
+                  'write_uid', 'write_date']
+        lines.invalidate_recordset(fnames)
+        lines.modified(fnames)
+        lines.flush_recordset()
+        lines._log_shipment_adjustments(previous)
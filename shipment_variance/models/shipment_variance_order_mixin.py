@@ -0,0 +1,26 @@
+from odoo import models
+
+
+class ShipmentVarianceOrderMixin(models.AbstractModel):
+    """Keeps the variance rollup of the lines in step with the order columns it reads"""
+    _name = 'shipment.variance.order.mixin'
+    _description = 'Manual Shipment Variance Order Mixin'
+
+    # Line model of the orders (inheriting shipment.variance.mixin) and the order columns of its rollup key
+    _shipment_line_model = None
+    _shipment_rollup_order_fields = frozenset()
+
+    def _write(self, vals):
+        lines = self.env[self._shipment_line_model]
+        rollup = not self._shipment_rollup_order_fields.isdisjoint(vals)
+        if rollup:
+            lines._update_variance_rollup_of_orders(self.ids, -1)
+        result = super(ShipmentVarianceOrderMixin, self)._write(vals)
+        if rollup:
+            lines._update_variance_rollup_of_orders(self.ids, 1)
+        return result
+
+    def unlink(self):
+        # the database cascade removes the lines without going through their unlink
+        self.env[self._shipment_line_model]._update_variance_rollup_of_orders(self.ids, -1)
+        return super(ShipmentVarianceOrderMixin, self).unlink()
@@ -0,0 +1,225 @@
+import base64
+import json
+
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+
+
+def _encode_cursor(key):
+    """Opaque pagination cursor for an (order_id, id) sort key"""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode()
+
+
+def _decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        order_id, line_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return int(order_id), int(line_id)
+    except (TypeError, ValueError):
+        raise UserError("Invalid pagination cursor")
+
+
+SUMMARY_PERIODS = ('day', 'week', 'month')
+
+
+def _is_day(value):
+    """Whether a date filter is a 'YYYY-MM-DD' string, which the domain of a datetime field
+    spans over the whole day, as the daily rollups do"""
+    return isinstance(value, str) and len(value) == 10
+
+
+class ShipmentVarianceReportMixin(models.AbstractModel):
+    _name = 'shipment.variance.report.mixin'
+    _description = 'Manual Shipment Variance Reporting Mixin'
+
+    # Inheriting line models also inherit shipment.variance.mixin and implement
+    # get_manual_shipment_data_batch(), the one-query serializer of a recordset,
+    # and _variance_domain(filters), the domain of the report lines, on which
+    # the reporting API is built.
+
+    # Date field of the order model bucketing the variance summary by period
+    _shipment_order_date_field = 'date_order'
+
+    # Variance summary groups, which must include 'product':
+    # group_by: (grouped column, join from the grouped rows to their name, name column).
+    # The order of the line can be referenced as line_order, the name column may take the language as %s.
+    _shipment_summary_groups = {}
+
+    # Model specific aggregates of the variance summary, appended to the common ones
+    _shipment_summary_columns = ''
+
+    def get_manual_shipment_data(self):
+        """
+        Helper method for API: Returns JSON-friendly dict with all relevant data.
+        """
+        self.ensure_one()
+        return self.get_manual_shipment_data_batch()[0]
+
+    @api.model
+    def _variance_keyset_search(self, filters=None, after=None, limit=100):
+        """
+        (id, order_id) of the next ``limit`` variance lines sorted by
+        (order_id desc, id desc), following the (order_id, id) key ``after``.
+
+        The row comparison on the sort key is served by the keyset indexes, so
+        a deep page costs the same as the first one.
+        """
+        domain = self._variance_domain(filters)
+        self._flush_search(domain, fields=['order_id'])
+        query = self._where_calc(domain)
+        self._apply_ir_rules(query, 'read')
+        if after:
+            query.add_where('("{table}"."order_id", "{table}"."id") < (%s, %s)'.format(table=self._table), list(after))
+        query.order = '"{table}"."order_id" DESC, "{table}"."id" DESC'.format(table=self._table)
+        query.limit = limit
+        query_str, params = query.select('"%s"."id"' % self._table, '"%s"."order_id"' % self._table)
+        self.env.cr.execute(query_str, params)
+        return self.env.cr.fetchall()
+
+    @api.model
+    def get_variance_page(self, filters=None, cursor=None, limit=100):
+        """
+        One page of the variance report, newest orders first.
+        filters: see _variance_domain
+        cursor: next_cursor of the previous page, None for the first page
+        Returns: {'records': list of dicts, 'next_cursor': str or None (last page)}
+        """
+        self.check_access_rights('read')
+        limit = max(int(limit), 1)
+        keys = self._variance_keyset_search(filters, _decode_cursor(cursor), limit + 1)
+        page = keys[:limit]
+        return {
+            'records': self.browse([line_id for line_id, order_id in page]).get_manual_shipment_data_batch(),
+            'next_cursor': _encode_cursor((page[-1][1], page[-1][0])) if len(keys) > limit else None,
+        }
+
+    @api.model
+    def _iter_variance_pages(self, filters=None, page_size=1000):
+        """
+        Generator over the variance report, one list of row dicts per page.
+
+        Pages are read with keyset pagination, each page is serialized with one
+        query, and the cache is emptied between pages so memory use does not
+        grow with the number of lines.
+        """
+        after = None
+        while True:
+            keys = self._variance_keyset_search(filters, after, page_size)
+            if not keys:
+                return
+            rows = self.browse([line_id for line_id, order_id in keys]).get_manual_shipment_data_batch()
+            after = (keys[-1][1], keys[-1][0])
+            self.env.invalidate_all()
+            yield rows
+            if len(keys) < page_size:
+                return
+
+    # =====================================================
+    # VARIANCE SUMMARY
+    # =====================================================
+    @api.model
+    def _can_use_variance_rollup(self):
+        """Whether the rollup shows the same lines as a search of the current user"""
+        return True
+
+    @api.model
+    def get_variance_summary(self, group_by='product', filters=None, period=None, percentiles=False):
+        """
+        Get aggregated variance data for reporting.
+        group_by: one of ``_shipment_summary_groups``, 'product' by default
+        filters: see _variance_domain
+        period: None | 'day' | 'week' | 'month', adds a 'period' bucket on the order date
+        percentiles: add variance_p50, variance_p90 and variance_p95 to each group
+                     (opt-in, they need the lines)
+        Returns: list of dicts with line_count, total_ordered, total_manual_shipped,
+                 total_variance, adjusted_count and the model specific aggregates
+
+        Summaries without percentiles on the groups and filters of the rollup,
+        with whole-day date filters, are read from ``_shipment_rollup_model``
+        instead of the lines when _can_use_variance_rollup allows it.
+        """
+        groups = self._shipment_summary_groups
+        if group_by not in groups:
+            group_by = 'product'
+        if period and period not in SUMMARY_PERIODS:
+            raise UserError("Invalid period '%s', expected one of: %s" % (period, ', '.join(SUMMARY_PERIODS)))
+        if not percentiles and self._shipment_rollup_model:
+            rollup = self.env[self._shipment_rollup_model]
+            rollup_filters = {'date_from', 'date_to'}.union(rollup._rollup_filters)
+            used_filters = {key for key, value in (filters or {}).items() if value}
+            days = all(_is_day(filters[key]) for key in ('date_from', 'date_to') if key in used_filters)
+            if group_by in rollup._rollup_groups and used_filters <= rollup_filters and days \
+                    and self._can_use_variance_rollup():
+                self.check_access_rights('read')
+                return rollup.sudo()._get_summary(group_by, filters, period)
+        key_column, name_join, name_column = groups[group_by]
+
+        order_model = self.env[self._fields['order_id'].comodel_name]
+        domain = self._variance_domain(filters)
+        self.flush_model()
+        order_model.flush_model()
+        self.env['res.partner'].flush_model(['name'])
+        self.env['product.template'].flush_model(['name'])
+        query = self._where_calc(domain)
+        self._apply_ir_rules(query, 'read')
+        from_clause, where_clause, params = query.get_sql()
+
+        period_column = 'NULL::date'
+        if period:
+            period_column = "date_trunc('%s', line_order.%s)::date" % (period, self._shipment_order_date_field)
+        order_join = ''
+        if period or key_column.startswith('line_order.'):
+            order_join = 'JOIN "{order_table}" line_order ON line_order.id = "{table}".order_id'.format(
+                order_table=order_model._table, table=self._table)
+        percentile_column = ''
+        if percentiles:
+            percentile_column = """,
+                       percentile_cont(ARRAY[0.5, 0.9, 0.95]) WITHIN GROUP
+                           (ORDER BY "{table}".qty_diff_manual) AS variance_percentiles""".format(table=self._table)
+
+        self.env.cr.execute("""
+            WITH groups AS (
+                SELECT {key_column} AS group_id,
+                       {period_column} AS period,
+                       COUNT(*) AS line_count,
+                       COALESCE(SUM("{table}".{ordered_column}), 0)::float8 AS total_ordered,
+                       COALESCE(SUM("{table}".manual_shipped_qty), 0)::float8 AS total_manual_shipped,
+                       COALESCE(SUM("{table}".qty_diff_manual), 0)::float8 AS total_variance,
+                       COUNT(*) FILTER (WHERE "{table}".manual_adjusted) AS adjusted_count
+                       {extra_columns}
+                       {percentile_column}
+                  FROM {from_clause}
+                  {order_join}
+                 WHERE {where_clause}
+              GROUP BY 1, 2
+            )
+            SELECT groups.*, {name_column} AS group_name
+              FROM groups
+              {name_join}
+          ORDER BY groups.period, groups.total_variance DESC
+        """.format(
+            key_column=key_column,
+            period_column=period_column,
+            table=self._table,
+            ordered_column=self._shipment_ordered_qty_field,
+            extra_columns=self._shipment_summary_columns,
+            percentile_column=percentile_column,
+            from_clause=from_clause,
+            order_join=order_join,
+            where_clause=where_clause or 'TRUE',
+            name_column=name_column,
+            name_join=name_join,
+        ), params + [self.env.lang or 'en_US'] * name_column.count('%s'))
+        results = self.env.cr.dictfetchall()
+        for row in results:
+            group_id = row.pop('group_id')
+            row['group_key'] = str(group_id) if group_id is not None else None
+            if period:
+                row['period'] = fields.Date.to_string(row['period'])
+            else:
+                del row['period']
+            if percentiles:
+                p50, p90, p95 = row.pop('variance_percentiles') or (None, None, None)
+                row.update(variance_p50=p50, variance_p90=p90, variance_p95=p95)
+        return results
@@ -0,0 +1,194 @@
+from odoo import models, fields, api
+
+
+class ShipmentVarianceRollupMixin(models.AbstractModel):
+    """Daily rollup of the variance lines of a line model.
+
+    Rows hold the aggregates of the lines with a manual shipped quantity per
+    day and key; the line model adds and removes its lines through
+    _apply_lines, so the rollup always matches the stored lines.
+    """
+    _name = 'shipment.variance.rollup.mixin'
+    _description = 'Shipment Variance Rollup Mixin'
+    _order = 'day desc'
+    _log_access = False
+
+    # Aggregated line model; the SQL expressions below read its lines as l and their orders as o
+    _rollup_line_model = None
+    # SQL expression of the day of a line
+    _rollup_day = 'o.date_order::date'
+    # Key columns after the day: (rollup column, SQL expression)
+    _rollup_keys = ()
+    # Aggregated columns: (rollup column, SQL aggregate), added up when rows meet on the same key;
+    # they cover at least the aggregated fields below
+    _rollup_measures = ()
+    # get_variance_summary groups and filters answered by the rollup: {group_by or filter: rollup column}
+    _rollup_groups = {}
+    _rollup_filters = {}
+    # Rollup column restricted to the companies of the environment, if any
+    _rollup_company_column = None
+
+    day = fields.Date(string='Day', required=True, readonly=True, help='Order date')
+    line_count = fields.Integer(string='Lines', readonly=True)
+    total_ordered = fields.Float(string='Ordered', readonly=True)
+    total_manual_shipped = fields.Float(string='Manual Shipped', readonly=True)
+    total_variance = fields.Float(string='Variance', readonly=True)
+    adjusted_count = fields.Integer(string='Adjusted Lines', readonly=True)
+
+    def _rollup_key_sql(self):
+        # key columns may be empty, so the rollup key cannot be a plain unique constraint
+        return ', '.join(['day'] + ['COALESCE(%s, 0)' % column for column, _expression in self._rollup_keys])
+
+    def _rollup_columns_sql(self):
+        columns = ['day'] + [column for column, _expression in self._rollup_keys + self._rollup_measures]
+        return '(%s)' % ', '.join(columns)
+
+    def _rollup_select_sql(self, line_filter=''):
+        """Contribution of the variance lines to the rollup, multiplied by %(sign)s"""
+        lines = self.env[self._rollup_line_model]
+        orders = self.env[lines._fields['order_id'].comodel_name]
+        expressions = [self._rollup_day] + [expression for _column, expression in self._rollup_keys]
+        return """
+            SELECT {keys},
+                   {measures}
+              FROM "{line_table}" l
+              JOIN "{order_table}" o ON o.id = l.order_id
+             WHERE l.manual_shipped_qty > 0
+               {line_filter}
+          GROUP BY {group_by}
+        """.format(
+            keys=', '.join(expressions),
+            measures=', '.join('%%(sign)s * %s' % aggregate for _column, aggregate in self._rollup_measures),
+            line_table=lines._table,
+            order_table=orders._table,
+            line_filter=line_filter,
+            group_by=', '.join(str(index) for index in range(1, len(expressions) + 1)),
+        )
+
+    def init(self):
+        if self._abstract:
+            return
+        self.env.cr.execute('CREATE UNIQUE INDEX IF NOT EXISTS "{table}_key_idx" ON "{table}" ({key})'.format(
+            table=self._table, key=self._rollup_key_sql(),
+        ))
+
+    @api.model
+    def _apply_lines(self, line_ids, sign):
+        """Add (sign=1) or remove (sign=-1) the stored values of lines to the rollup.
+
+        The lines are read from the database, so callers remove them right
+        before their rows change and add them back right after; the rollup
+        follows every change with two grouped statements instead of a rescan.
+        """
+        if not line_ids:
+            return
+        self.env.cr.execute("""
+            INSERT INTO "{table}" {columns}
+            {select}
+            ON CONFLICT ({key}) DO UPDATE
+               SET {updates}
+        """.format(
+            table=self._table,
+            columns=self._rollup_columns_sql(),
+            select=self._rollup_select_sql('AND l.id = ANY(%(ids)s)'),
+            key=self._rollup_key_sql(),
+            updates=', '.join(
+                '{column} = "{table}".{column} + EXCLUDED.{column}'.format(table=self._table, column=column)
+                for column, _aggregate in self._rollup_measures
+            ),
+        ), {
+            'sign': sign,
+            'ids': list(line_ids),
+        })
+        if sign < 0:
+            self.env.cr.execute('DELETE FROM "%s" WHERE line_count <= 0' % self._table)
+        self.invalidate_model()
+
+    @api.model
+    def rebuild_rollup(self):
+        """Rebuild the whole rollup from the lines (backfills and repairs)"""
+        self.env.flush_all()
+        self.env.cr.execute('DELETE FROM "%s"' % self._table)
+        self.env.cr.execute('INSERT INTO "{table}" {columns} {select}'.format(
+            table=self._table,
+            columns=self._rollup_columns_sql(),
+            select=self._rollup_select_sql(),
+        ), {'sign': 1})
+        self.invalidate_model()
+        return True
+
+    @api.model
+    def _get_summary(self, group_by, filters=None, period=None):
+        """
+        get_variance_summary answered from the rollup.
+        group_by: one of ``_rollup_groups``
+        filters: date_from, date_to (whole days) and the keys of ``_rollup_filters``
+        """
+        self.flush_model()
+        key_column = self._rollup_groups[group_by]
+        conditions, params = ['TRUE'], {'lang': self.env.lang or 'en_US'}
+        if self._rollup_company_column:
+            conditions.append('(r.{column} IS NULL OR r.{column} = ANY(%(company_ids)s))'.format(
+                column=self._rollup_company_column,
+            ))
+            params['company_ids'] = self.env.companies.ids
+        filters = filters or {}
+        if filters.get('date_from'):
+            conditions.append('r.day >= %(date_from)s')
+            params['date_from'] = fields.Date.to_date(filters['date_from'])
+        if filters.get('date_to'):
+            conditions.append('r.day <= %(date_to)s')
+            params['date_to'] = fields.Date.to_date(filters['date_to'])
+        for key, column in self._rollup_filters.items():
+            if filters.get(key):
+                conditions.append('r.{column} = ANY(%({key})s)'.format(column=column, key=key))
+                params[key] = list(filters[key])
+        period_column = 'NULL::date'
+        if period:
+            period_column = "date_trunc('%s', r.day)::date" % period
+        comodel = self.env[self._fields[key_column].comodel_name]
+        if comodel._name == 'product.product':
+            name_join = 'LEFT JOIN product_product pp ON pp.id = groups.group_id ' \
+                        'LEFT JOIN product_template pt ON pt.id = pp.product_tmpl_id'
+            name_column = "COALESCE(pt.name->>%(lang)s, pt.name->>'en_US')"
+        else:
+            name_join = 'LEFT JOIN "%s" n ON n.id = groups.group_id' % comodel._table
+            name_column = 'n.name'
+        measures = [
+            'SUM(r.{column})::{cast} AS {column}'.format(
+                column=column, cast='int' if self._fields[column].type == 'integer' else 'float8',
+            )
+            for column, _aggregate in self._rollup_measures
+        ]
+
+        self.env.cr.execute("""
+            WITH groups AS (
+                SELECT r.{key_column} AS group_id,
+                       {period_column} AS period,
+                       {measures}
+                  FROM "{table}" r
+                 WHERE {conditions}
+              GROUP BY 1, 2
+            )
+            SELECT groups.*, {name_column} AS group_name
+              FROM groups
+              {name_join}
+          ORDER BY groups.period, groups.total_variance DESC
+        """.format(
+            key_column=key_column,
+            period_column=period_column,
+            measures=',\n                       '.join(measures),
+            table=self._table,
+            conditions=' AND '.join(conditions),
+            name_column=name_column,
+            name_join=name_join,
+        ), params)
+        results = self.env.cr.dictfetchall()
+        for row in results:
+            group_id = row.pop('group_id')
+            row['group_key'] = str(group_id) if group_id is not None else None
+            if period:
+                row['period'] = fields.Date.to_string(row['period'])
+            else:
+                del row['period']
+        return results